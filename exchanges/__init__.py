@@ -3,6 +3,7 @@ Exchange authentication package.
 
 Supports authentication for various cryptocurrency exchanges.
 """
+import importlib
 from typing import Protocol, Dict, Any
 
 
@@ -29,9 +30,26 @@ class ExchangeAuthenticator(Protocol):
         ...
 
 
-# Re-export authenticators for easy imports
-from .coinbase import get_coinbase_authenticator, place_order, verify_coinbase_connection, format_symbol_for_coinbase
-from .kraken import get_kraken_authenticator
+# Re-export authenticators for easy imports. Exchange modules are imported lazily
+# on first attribute access (PEP 562) so importing the package stays cheap on cold start.
+_LAZY_EXPORTS: Dict[str, str] = {
+    'get_coinbase_authenticator': '.coinbase',
+    'place_order': '.coinbase',
+    'verify_coinbase_connection': '.coinbase',
+    'format_symbol_for_coinbase': '.coinbase',
+    'warm_up_coinbase': '.coinbase',
+    'get_kraken_authenticator': '.kraken',
+}
+
+
+def __getattr__(name: str) -> Any:
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value  # Cache so later lookups bypass __getattr__
+    return value
+
 
 __all__ = [
     'ExchangeAuthenticator',
@@ -40,4 +58,5 @@ __all__ = [
     'place_order',
     'verify_coinbase_connection',
     'format_symbol_for_coinbase',
+    'warm_up_coinbase',
 ]
@@ -2,13 +2,114 @@
 Coinbase API authentication and JWT generation.
 """
 import requests
-from typing import Dict, Any, Optional
-import json
+from requests.adapters import HTTPAdapter
+from collections import OrderedDict
+from decimal import Decimal
+from typing import Callable, Dict, Any, Optional, Tuple
+from urllib.parse import urlsplit
+import base64
+import functools
+import orjson
 import os
 import logging
-import jwt
+import threading
 import time
-import uuid
+import secrets
+
+
+# Coinbase API base URL (read once at import; place_order/verify_coinbase_connection accept overrides)
+_DEFAULT_API_BASE_URL = os.getenv("COINBASE_API_BASE_URL", "https://api.coinbase.com")
+
+# Maximum number of (method, host, path) tokens kept by each authenticator
+_TOKEN_CACHE_SIZE = 16
+
+# Coinbase rejects JWTs valid for longer than 120 seconds
+_JWT_MAX_LIFETIME = 120
+
+# Token cache entry: (token, monotonic expiry time, request headers carrying the token)
+_CachedToken = Tuple[str, float, Dict[str, str]]
+
+# Accepted place_order arguments (action is compared after upper-casing)
+_VALID_ACTIONS = frozenset({"BUY", "SELL"})
+_VALID_QUANTITY_TYPES = frozenset({"cash", "units"})
+
+# Fields that must be present in the COINBASE_CREDENTIALS JSON
+_REQUIRED_CRED_FIELDS = frozenset({"name", "api_key", "private_key"})
+
+# Product increments rarely change, so cache (base_decimals, quote_decimals) per product
+_PRECISION_TTL_SECONDS = 3600.0
+_precision_cache: Dict[Tuple[str, str], Tuple[Tuple[int, int], float]] = {}
+
+# Currencies whose balances verify_coinbase_connection reports for the audit trail
+_WATCHED_CURRENCIES = frozenset({"BTC", "ETH", "USD", "USDC", "LTC", "BCH", "XRP", "ADA", "DOT", "SOL", "APT", "EUR"})
+
+# Keep tokens for the common endpoints pre-signed in a background thread (COINBASE_WARM_JWT=1)
+COINBASE_WARM_JWT = os.getenv("COINBASE_WARM_JWT", "false").lower() in ("1", "true")
+
+# Refresh well inside the 110s a cached token is served for (120s lifetime minus 10s buffer)
+_WARM_INTERVAL_SECONDS = 90.0
+_WARM_ENDPOINTS: Tuple[Tuple[str, str], ...] = (
+    ("POST", "/api/v3/brokerage/orders"),
+    ("GET", "/api/v3/brokerage/accounts"),
+)
+
+
+def _b64url(data: bytes) -> bytes:
+    """Base64url-encode without padding, as required for JWT segments."""
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+
+@functools.lru_cache(maxsize=8)
+def _split_base_url(url: str) -> Tuple[str, str]:
+    """
+    Split an API base URL into the host and path prefix signed in JWT 'uri' claims.
+    
+    Requests go to f"{url}{request_path}", so the signed path must include any path
+    in the base URL (e.g. a proxy mounted under "/coinbase") as well as the host.
+    
+    Args:
+        url: API base URL (e.g. https://api.coinbase.com)
+        
+    Returns:
+        Tuple of (host, path prefix without a trailing slash)
+    """
+    parts = urlsplit(url)
+    return parts.netloc, parts.path.rstrip("/")
+
+
+@functools.lru_cache(maxsize=4)
+def _load_es256_signer(private_key: str) -> Callable[[bytes], bytes]:
+    """
+    Parse a PEM EC private key and return an ES256 signing function.
+    
+    cryptography is imported here rather than at module level so it is only
+    loaded when an authenticator is first created, not on every cold start.
+    Signers are cached by PEM so authenticators sharing a key parse it once.
+    
+    Args:
+        private_key: P-256 EC private key in PEM format
+        
+    Returns:
+        Function that signs bytes and returns the raw 64-byte r||s signature used by JWS
+        
+    Raises:
+        ValueError: If the key is not a valid P-256 EC private key
+    """
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import ec
+    from cryptography.hazmat.primitives.asymmetric.utils import decode_dss_signature
+    
+    signing_key = serialization.load_pem_private_key(private_key.encode(), password=None)
+    if not isinstance(signing_key, ec.EllipticCurvePrivateKey) or signing_key.curve.name != "secp256r1":
+        raise ValueError("Coinbase private key must be a P-256 EC private key")
+    algorithm = ec.ECDSA(hashes.SHA256())
+    
+    def sign(signing_input: bytes) -> bytes:
+        # ES256 uses the raw r||s signature, not the DER encoding cryptography returns
+        r, s = decode_dss_signature(signing_key.sign(signing_input, algorithm))
+        return r.to_bytes(32, "big") + s.to_bytes(32, "big")
+    
+    return sign
 
 
 def format_symbol_for_coinbase(symbol: str) -> str:
@@ -32,8 +133,8 @@ def format_symbol_for_coinbase(symbol: str) -> str:
         >>> format_symbol_for_coinbase("ETH-EUR")
         "ETH-EUR"
     """
-    # Just return uppercase - symbol should already be in BTC-USD format
-    return symbol.upper()
+    # Just return uppercase - symbol should already be in BTC-USD format (reuse it as-is if so)
+    return symbol if symbol.isupper() else symbol.upper()
 
 
 class CoinbaseCredentials:
@@ -79,16 +180,33 @@ class CoinbaseCredentials:
         if not creds_json:
             raise ValueError(f"Environment variable '{env_var}' is not set")
         
+        return cls._from_json(env_var, creds_json)
+    
+    @classmethod
+    @functools.lru_cache(maxsize=4)
+    def _from_json(cls, env_var: str, creds_json: str) -> "CoinbaseCredentials":
+        """
+        Parse credentials JSON, memoized so an unchanged variable is parsed once.
+        
+        Args:
+            env_var: Environment variable name (used in error messages)
+            creds_json: Raw JSON credentials
+            
+        Returns:
+            CoinbaseCredentials instance
+            
+        Raises:
+            ValueError: If credentials are invalid
+        """
         try:
-            creds_data: Dict[str, Any] = json.loads(creds_json)
-        except json.JSONDecodeError as e:
+            creds_data: Dict[str, Any] = orjson.loads(creds_json)
+        except orjson.JSONDecodeError as e:
             raise ValueError(f"Invalid JSON in '{env_var}': {e}")
         assert isinstance(creds_data, dict), "Credentials JSON must be an object"
         # Validate required fields
-        required_fields = ["name", "api_key", "private_key"]
-        missing = [f for f in required_fields if f not in creds_data]
+        missing = _REQUIRED_CRED_FIELDS - creds_data.keys()
         if missing:
-            raise ValueError(f"Missing required credential fields: {', '.join(missing)}")
+            raise ValueError(f"Missing required credential fields: {', '.join(sorted(missing))}")
         
         # Unescape newlines in private key if needed
         private_key = creds_data["private_key"].replace("\\n", "\n")
@@ -97,7 +215,7 @@ class CoinbaseCredentials:
             name=creds_data["name"],
             api_key=creds_data["api_key"],
             private_key=private_key,
-            **{k: v for k, v in creds_data.items() if k not in required_fields}
+            **{k: creds_data[k] for k in creds_data.keys() - _REQUIRED_CRED_FIELDS}
         )
 
 
@@ -110,17 +228,30 @@ class CoinbaseAuthenticator:
         
         Args:
             credentials: CoinbaseCredentials instance
+            
+        Raises:
+            ValueError: If the private key is not a valid P-256 EC key in PEM format
         """
         self.credentials = credentials
-        self._cached_token: Optional[str] = None
-        self._token_expiry: float = 0.0
+        # Parse the PEM once; every JWT is signed with this key
+        self._sign = _load_es256_signer(credentials.private_key)
+        # Static JWT header fields and claims; only the nonce and timestamps change per token
+        self._jwt_header: Dict[str, str] = {"alg": "ES256", "typ": "JWT", "kid": credentials.api_key}
+        self._jwt_claims: Dict[str, str] = {"iss": "cdp", "sub": credentials.api_key}
+        # Static request headers; copied and given an Authorization value for each new token
+        self._header_template: Dict[str, str] = {"Authorization": "", "Content-Type": "application/json"}
+        # Tokens are bound to their 'uri' claim, so cache one per (method, host, path)
+        self._token_cache: "OrderedDict[Tuple[str, str, str], _CachedToken]" = OrderedDict()
+        self._token_lock = threading.Lock()
+        # Held while signing on a cache miss so concurrent misses for an endpoint sign once
+        self._sign_lock = threading.Lock()
     
     def generate_jwt(
         self,
         request_method: str = "GET",
         request_host: str = "api.coinbase.com",
         request_path: str = "/api/v3/brokerage/accounts",
-        expires_in: int = 120
+        expires_in: int = _JWT_MAX_LIFETIME
     ) -> str:
         """
         Generate a JWT token for Coinbase API authentication.
@@ -135,34 +266,32 @@ class CoinbaseAuthenticator:
             JWT token string
         """
         current_time = int(time.time())
-        
-        # Build the URI for the 'uri' claim
         uri = f"{request_method} {request_host}{request_path}"
+        return self._encode_jwt(uri, current_time, current_time + min(expires_in, _JWT_MAX_LIFETIME))
+    
+    def _encode_jwt(self, uri: str, nbf: int, exp: int) -> str:
+        """
+        Build and sign a JWT for an already-formatted URI and validity window.
         
-        # JWT payload
-        payload: Dict[str, Any] = {
-            "iss": "cdp",  # Issuer
-            "nbf": current_time,  # Not before
-            "exp": current_time + min(expires_in, 120),  # Expiration (max 120 seconds)
-            "sub": self.credentials.api_key,  # Subject (API key)
-            "uri": uri  # Request URI
-        }
+        Args:
+            uri: Value for the 'uri' claim ("METHOD host/path")
+            nbf: Not-before time (seconds since epoch)
+            exp: Expiration time (seconds since epoch), at most nbf + 120
+            
+        Returns:
+            JWT token string
+        """
+        # JWT payload: issuer/subject (API key) plus the per-token validity window and URI
+        payload: Dict[str, Any] = {**self._jwt_claims, "nbf": nbf, "exp": exp, "uri": uri}
         
         # JWT headers
-        headers = {
-            "kid": self.credentials.api_key,  # Key ID
-            "nonce": uuid.uuid4().hex  # Unique nonce
-        }
+        headers = {**self._jwt_header, "nonce": secrets.token_hex(16)}  # Unique nonce
         
         # Sign and encode the JWT
-        token = jwt.encode(
-            payload,
-            self.credentials.private_key,
-            algorithm="ES256",
-            headers=headers
-        )
+        signing_input = _b64url(orjson.dumps(headers)) + b"." + _b64url(orjson.dumps(payload))
+        token = (signing_input + b"." + _b64url(self._sign(signing_input))).decode("ascii")
         
-        logging.debug(f"Generated JWT for {uri} (expires in {expires_in}s)")
+        logging.debug("Generated JWT for %s (expires in %ss)", uri, exp - nbf)
         return token
     
     def get_token(
@@ -170,39 +299,24 @@ class CoinbaseAuthenticator:
         request_method: str = "GET",
         request_host: str = "api.coinbase.com",
         request_path: str = "/api/v3/brokerage/accounts",
-        use_cache: bool = False
+        use_cache: bool = True
     ) -> str:
         """
         Get a JWT token, using cached token if still valid.
         
-        Note: Caching is disabled by default because JWT tokens include the request URI
-        in their signature. Reusing a token across different endpoints will cause 401 errors.
+        JWT tokens include the request URI in their signature, so tokens are cached
+        per (method, host, path). A token is only reused for the endpoint it was signed for.
         
         Args:
             request_method: HTTP method
             request_host: API host
             request_path: API endpoint path
-            use_cache: Whether to use cached token if valid (NOT RECOMMENDED - disabled by default)
+            use_cache: Whether to use cached token if valid
             
         Returns:
             JWT token string
         """
-        current_time = time.time()
-        
-        # Return cached token if still valid (with 10s buffer)
-        if use_cache and self._cached_token and current_time < (self._token_expiry - 10):
-            logging.debug("Using cached JWT token")
-            return self._cached_token
-        
-        # Generate new token
-        expires_in = 120
-        token = self.generate_jwt(request_method, request_host, request_path, expires_in)
-        
-        # Cache the token (only useful if use_cache=True)
-        self._cached_token = token
-        self._token_expiry = current_time + expires_in
-        
-        return token
+        return self._get_cached_token(request_method, request_host, request_path, use_cache)[0]
     
     def get_auth_headers(
         self,
@@ -221,16 +335,147 @@ class CoinbaseAuthenticator:
         Returns:
             Dictionary of HTTP headers including Authorization
         """
-        token = self.get_token(request_method, request_host, request_path)
-        return {
-            "Authorization": f"Bearer {token}",
-            "Content-Type": "application/json"
-        }
+        # Headers are built once per token; hand out a copy so callers can't alter the cached dict
+        return self._get_cached_token(request_method, request_host, request_path)[2].copy()
+    
+    def _lookup_token(self, key: Tuple[str, str, str], current_time: float) -> Optional[_CachedToken]:
+        """Return the cached entry for an endpoint if it is still valid (with 10s buffer)."""
+        with self._token_lock:
+            cached = self._token_cache.get(key)
+            if cached is not None and current_time < (cached[1] - 10):
+                self._token_cache.move_to_end(key)
+                logging.debug("Using cached JWT token")
+                return cached
+        return None
+    
+    def _get_cached_token(
+        self,
+        request_method: str,
+        request_host: str,
+        request_path: str,
+        use_cache: bool = True
+    ) -> _CachedToken:
+        """
+        Look up or sign the token for an endpoint, together with its request headers.
+        
+        Args:
+            request_method: HTTP method
+            request_host: API host
+            request_path: API endpoint path
+            use_cache: Whether to use cached token if valid
+            
+        Returns:
+            Tuple of (token, expiry time, request headers)
+        """
+        # Cache expiry uses the monotonic clock so wall-clock adjustments can't extend a token's reuse
+        current_time = time.monotonic()
+        key = (request_method, request_host, request_path)
+        
+        # Return cached token if still valid (with 10s buffer)
+        if use_cache:
+            cached = self._lookup_token(key, current_time)
+            if cached is not None:
+                return cached
+        
+        # Sign one token at a time: threads that missed the cache together re-check it here,
+        # so only the first signs and the rest reuse its token
+        with self._sign_lock:
+            if use_cache:
+                cached = self._lookup_token(key, current_time)
+                if cached is not None:
+                    return cached
+            
+            # Generate a new max-lifetime token (skips generate_jwt's lifetime clamp)
+            issued_at = int(time.time())
+            token = self._encode_jwt(f"{request_method} {request_host}{request_path}", issued_at, issued_at + _JWT_MAX_LIFETIME)
+            headers = self._header_template.copy()
+            headers["Authorization"] = "Bearer " + token
+            entry = (token, current_time + _JWT_MAX_LIFETIME, headers)
+            
+            # Cache the token; when full, drop expired tokens first, then the least recently used endpoint
+            with self._token_lock:
+                self._token_cache[key] = entry
+                self._token_cache.move_to_end(key)
+                if len(self._token_cache) > _TOKEN_CACHE_SIZE:
+                    expired = [k for k, cached in self._token_cache.items() if cached[1] <= current_time]
+                    for k in expired:
+                        del self._token_cache[k]
+                    if len(self._token_cache) > _TOKEN_CACHE_SIZE:
+                        self._token_cache.popitem(last=False)
+        
+        return entry
+
+
+# Shared HTTP session (created lazily) so warm invocations reuse TCP/TLS connections
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def _get_session() -> requests.Session:
+    """
+    Get or create the shared requests.Session used for Coinbase API calls.
+    
+    Returns:
+        requests.Session with a pooled HTTPS adapter (keep-alive enabled)
+    """
+    global _session
+    
+    # Double-checked so concurrent first requests build a single session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+                _session = session
+    
+    return _session
 
 
 # Global authenticator instance (loaded lazily)
 _authenticator: Optional[CoinbaseAuthenticator] = None
 
+_authenticator_lock = threading.Lock()
+
+# Set to stop the background token warmer, if one is running
+_token_warmer_stop: Optional[threading.Event] = None
+
+
+def _start_token_warmer(
+    authenticator: CoinbaseAuthenticator,
+    host: str,
+    path_prefix: str = "",
+    interval: float = _WARM_INTERVAL_SECONDS
+) -> threading.Event:
+    """
+    Start a daemon thread that periodically re-signs tokens for _WARM_ENDPOINTS.
+    
+    Keeps the authenticator's token cache populated so order requests never wait
+    on ECDSA signing.
+    
+    Args:
+        authenticator: Authenticator whose token cache is refreshed
+        host: API host the tokens are issued for
+        path_prefix: Path of the API base URL, prepended to each endpoint path
+        interval: Seconds between refreshes
+        
+    Returns:
+        Event that stops the thread when set
+    """
+    stop = threading.Event()
+    
+    def refresh_tokens() -> None:
+        while True:
+            for method, path in _WARM_ENDPOINTS:
+                try:
+                    authenticator.get_token(method, host, path_prefix + path, use_cache=False)
+                except Exception:
+                    logging.warning("Failed to pre-sign JWT for %s %s", method, path, exc_info=True)
+            if stop.wait(interval):
+                return
+    
+    threading.Thread(target=refresh_tokens, name="coinbase-jwt-warmer", daemon=True).start()
+    return stop
+
 
 def get_coinbase_authenticator() -> CoinbaseAuthenticator:
     """
@@ -242,20 +487,58 @@ def get_coinbase_authenticator() -> CoinbaseAuthenticator:
     Raises:
         ValueError: If credentials cannot be loaded
     """
-    global _authenticator
+    global _authenticator, _token_warmer_stop
     
+    # Double-checked so concurrent first requests build a single authenticator
     if _authenticator is None:
-        credentials = CoinbaseCredentials.from_env()
-        _authenticator = CoinbaseAuthenticator(credentials)
-        logging.info(f"Initialized Coinbase authenticator for account: {credentials.name}")
+        with _authenticator_lock:
+            if _authenticator is None:
+                credentials = CoinbaseCredentials.from_env()
+                authenticator = CoinbaseAuthenticator(credentials)
+                logging.info("Initialized Coinbase authenticator for account: %s", credentials.name)
+                
+                if COINBASE_WARM_JWT and _token_warmer_stop is None:
+                    _token_warmer_stop = _start_token_warmer(authenticator, *_split_base_url(_DEFAULT_API_BASE_URL))
+                _authenticator = authenticator
     
     return _authenticator
 
 
+def warm_up_coinbase() -> None:
+    """
+    Prepare for the first order during worker start-up.
+    
+    Builds the authenticator (loading credentials and the signing key), signs tokens
+    for _WARM_ENDPOINTS and opens a pooled TLS connection to the API host. Failures
+    are logged rather than raised so a misconfiguration cannot stop the worker loading.
+    """
+    try:
+        authenticator = get_coinbase_authenticator()
+        host, path_prefix = _split_base_url(_DEFAULT_API_BASE_URL)
+        for method, path in _WARM_ENDPOINTS:
+            authenticator.get_token(method, host, path_prefix + path)
+        _get_session().head(_DEFAULT_API_BASE_URL, timeout=2)
+    except Exception:
+        logging.warning("Coinbase warm-up failed", exc_info=True)
+
+
+def _decimals_from_increment(increment: str) -> int:
+    """Count the decimal places in an increment string (e.g. "0.00000001" -> 8, "1" -> 0, "1E-8" -> 8)."""
+    if "e" in increment or "E" in increment:
+        # Exponent notation is rare; let Decimal resolve it rather than counting digits
+        exponent = Decimal(increment).normalize().as_tuple().exponent
+        return max(0, -exponent) if isinstance(exponent, int) else 0
+    _, _, fraction = increment.partition(".")
+    return len(fraction.rstrip("0"))
+
+
 def _get_product_precision(symbol: str, api_base_url: str) -> tuple[int, int]:
     """
     Get base and quote decimal precision for a product from Coinbase API.
     
+    Results are cached per (api_base_url, symbol) for _PRECISION_TTL_SECONDS, so
+    repeat orders for a product skip the extra API round trip.
+    
     Args:
         symbol: Trading pair (e.g., "BTC-USD")
         api_base_url: Coinbase API base URL
@@ -263,36 +546,37 @@ def _get_product_precision(symbol: str, api_base_url: str) -> tuple[int, int]:
     Returns:
         Tuple of (base_decimals, quote_decimals)
     """
-    import requests
-    from decimal import Decimal
+    cache_key = (api_base_url, symbol)
+    cached = _precision_cache.get(cache_key)
+    if cached is not None and time.monotonic() < cached[1]:
+        return cached[0]
     
     authenticator = get_coinbase_authenticator()
     request_path = f"/api/v3/brokerage/market/products/{symbol}"
-    host = api_base_url.replace("https://", "").replace("http://", "")
+    host, path_prefix = _split_base_url(api_base_url)
     
     headers = authenticator.get_auth_headers(
         request_method="GET",
         request_host=host,
-        request_path=request_path
+        request_path=path_prefix + request_path
     )
     
     url = f"{api_base_url}{request_path}"
-    response = requests.get(url, headers=headers, timeout=10)
+    response = _get_session().get(url, headers=headers, timeout=10)
     response.raise_for_status()
     
-    product = response.json()
+    product = orjson.loads(response.content)
     
-    # Parse increment strings to determine decimal places
-    base_increment = Decimal(product.get("base_increment", "0.00000001"))
-    quote_increment = Decimal(product.get("quote_increment", "0.01"))
+    # Count decimal places from the increment strings
+    base_increment: str = product.get("base_increment", "0.00000001")
+    quote_increment: str = product.get("quote_increment", "0.01")
+    base_decimals = _decimals_from_increment(base_increment)
+    quote_decimals = _decimals_from_increment(quote_increment)
     
-    # Count decimal places from increment
-    base_decimals: int = abs(int(base_increment.as_tuple().exponent)) if isinstance(base_increment.as_tuple().exponent, int) else 8
-    quote_decimals: int = abs(int(quote_increment.as_tuple().exponent)) if isinstance(quote_increment.as_tuple().exponent, int) else 2
-    
-    logging.debug(f"Product {symbol}: base_increment={base_increment} ({base_decimals} decimals), "
-                  f"quote_increment={quote_increment} ({quote_decimals} decimals)")
+    logging.debug("Product %s: base_increment=%s (%s decimals), quote_increment=%s (%s decimals)",
+                  symbol, base_increment, base_decimals, quote_increment, quote_decimals)
     
+    _precision_cache[cache_key] = ((base_decimals, quote_decimals), time.monotonic() + _PRECISION_TTL_SECONDS)
     return base_decimals, quote_decimals
 
 
@@ -306,8 +590,12 @@ def _format_quantity(value: float, decimals: int) -> str:
         
     Returns:
         Formatted string with appropriate decimal places, trailing zeros stripped
+        (fixed-point, never scientific notation)
     """
-    formatted = f"{value:.{decimals}f}".rstrip('0').rstrip('.')
+    formatted = f"{value:.{decimals}f}"
+    # Only strip fractional zeros; with 0 decimals "50000" must stay "50000"
+    if "." in formatted:
+        formatted = formatted.rstrip('0').rstrip('.')
     return formatted
 
 
@@ -337,15 +625,13 @@ def place_order(
         ValueError: If parameters are invalid
         requests.HTTPError: If API request fails
     """
-    import requests
-    
     # Validate action
     action = action.upper()
-    if action not in ["BUY", "SELL"]:
+    if action not in _VALID_ACTIONS:
         raise ValueError(f"Invalid action: {action}. Must be 'buy' or 'sell'")
     
     # Validate quantity_type
-    if quantity_type not in ["cash", "units"]:
+    if quantity_type not in _VALID_QUANTITY_TYPES:
         raise ValueError(f"Invalid quantity_type: {quantity_type}. Must be 'cash' or 'units'")
     
     # Validate close_price - required for limit orders
@@ -354,19 +640,20 @@ def place_order(
     
     # Convert symbol to Coinbase format (uppercase normalization)
     coinbase_symbol = format_symbol_for_coinbase(symbol)
-    logging.info(f"Symbol conversion: {symbol} -> {coinbase_symbol}")
+    logging.info("Symbol conversion: %s -> %s", symbol, coinbase_symbol)
     
     # For cash-based orders, we need to calculate units based on close price
     if quantity_type == "cash":
         # Calculate how many units to buy/sell based on cash amount and current price
         calculated_units = quantity / close_price
-        logging.info(f"Converting {action} cash amount ${quantity} to {calculated_units} units at price ${close_price}")
+        logging.info("Converting %s cash amount $%s to %s units at price $%s",
+                     action, quantity, calculated_units, close_price)
         quantity = calculated_units
         quantity_type = "units"  # Now we're working with units
     
     # Get API base URL
     if api_base_url is None:
-        api_base_url = os.getenv("COINBASE_API_BASE_URL", "https://api.coinbase.com")
+        api_base_url = _DEFAULT_API_BASE_URL
     
     # Get product precision from Coinbase API
     base_decimals, quote_decimals = _get_product_precision(coinbase_symbol, api_base_url)
@@ -374,20 +661,21 @@ def place_order(
     # Build order configuration
     order_config: Dict[str, Any] = {}
     
-    # Format limit price with quote currency decimals
+    # Format base size and limit price with the product's base and quote currency decimals
+    formatted_base_size = _format_quantity(quantity, base_decimals)
     formatted_limit_price = _format_quantity(close_price, quote_decimals)
     
     # At this point, quantity_type is always "units" (cash was converted above)
     # All orders use base_size (crypto amount)
     order_config["limit_limit_gtc"] = {
-        "base_size": _format_quantity(quantity, base_decimals),
+        "base_size": formatted_base_size,
         "limit_price": formatted_limit_price,
         "post_only": False
     }
     
     # Build request body
     request_body: Dict[str, Any] = {
-        "client_order_id": str(uuid.uuid4()),
+        "client_order_id": secrets.token_hex(16),  # Idempotency key; any unique string is accepted
         "product_id": coinbase_symbol,
         "side": action,
         "order_configuration": order_config
@@ -397,37 +685,40 @@ def place_order(
     authenticator = get_coinbase_authenticator()
     request_path = "/api/v3/brokerage/orders"
     
-    # Extract host from URL for JWT generation
-    host = api_base_url.replace("https://", "").replace("http://", "")
+    # Extract host and path prefix from URL for JWT generation
+    host, path_prefix = _split_base_url(api_base_url)
     
     headers = authenticator.get_auth_headers(
         request_method="POST",
         request_host=host,
-        request_path=request_path
+        request_path=path_prefix + request_path
     )
     
     # Make API request
     url = f"{api_base_url}{request_path}"
     
     # Log request details
-    logging.info(f"Placing {action} order for {coinbase_symbol}: {_format_quantity(quantity, base_decimals)} units @ {formatted_limit_price}")
-    logging.debug(f"API URL: {url}")
-    logging.debug(f"Request body: {json.dumps(request_body, indent=2)}")
+    logging.info("Placing %s order for %s: %s units @ %s", action, coinbase_symbol, formatted_base_size, formatted_limit_price)
+    logging.debug("API URL: %s", url)
+    if logging.getLogger().isEnabledFor(logging.DEBUG):
+        logging.debug("Request body: %s", orjson.dumps(request_body, option=orjson.OPT_INDENT_2).decode())
     
-    response = requests.post(url, headers=headers, json=request_body, timeout=30)
+    # Pre-encode with orjson; the auth headers already carry Content-Type: application/json
+    response = _get_session().post(url, headers=headers, data=orjson.dumps(request_body), timeout=30)
     response.raise_for_status()
     
-    result = response.json()
+    result = orjson.loads(response.content)
     
     # Log response details
     if result.get("success"):
         success_resp = result.get("success_response", {})
-        logging.info(f"Order API response - Success: True, Order ID: {success_resp.get('order_id')}, "
-                    f"Product: {success_resp.get('product_id')}, Side: {success_resp.get('side')}")
+        logging.info("Order API response - Success: True, Order ID: %s, Product: %s, Side: %s",
+                     success_resp.get('order_id'), success_resp.get('product_id'), success_resp.get('side'))
     else:
-        logging.warning(f"Order API response - Success: False")
+        logging.warning("Order API response - Success: False")
     
-    logging.debug(f"Full API response: {json.dumps(result, indent=2)}")
+    if logging.getLogger().isEnabledFor(logging.DEBUG):
+        logging.debug("Full API response: %s", orjson.dumps(result, option=orjson.OPT_INDENT_2).decode())
     
     # Check if order was successful
     if not result.get("success"):
@@ -435,7 +726,7 @@ def place_order(
         error_msg = error_response.get("message", "Unknown error")
         error_details = error_response.get("error_details", "")
         error_reason = error_response.get("error", "UNKNOWN")
-        logging.error(f"Order failed - Error: {error_reason}, Message: {error_msg}, Details: {error_details}")
+        logging.error("Order failed - Error: %s, Message: %s, Details: %s", error_reason, error_msg, error_details)
         raise ValueError(f"Order failed: {error_msg}. Details: {error_details}")
     
     return result
@@ -463,42 +754,59 @@ def verify_coinbase_connection(api_base_url: Optional[str] = None) -> Dict[str,
     
     # Get API base URL
     if api_base_url is None:
-        api_base_url = os.getenv("COINBASE_API_BASE_URL", "https://api.coinbase.com")
+        api_base_url = _DEFAULT_API_BASE_URL
     
     # Get authenticator
     authenticator = get_coinbase_authenticator()
     request_path = "/api/v3/brokerage/accounts"
     
-    # Extract host from URL for JWT generation
-    host = api_base_url.replace("https://", "").replace("http://", "")
+    # Extract host and path prefix from URL for JWT generation
+    host, path_prefix = _split_base_url(api_base_url)
     
     headers = authenticator.get_auth_headers(
         request_method="GET",
         request_host=host,
-        request_path=request_path
+        request_path=path_prefix + request_path
     )
     
     # Make API request - paginate through all accounts
     url = f"{api_base_url}{request_path}"
     logging.info("Verifying Coinbase API connectivity...")
-    logging.debug(f"API URL: {url}")
+    logging.debug("API URL: %s", url)
     
-    all_accounts: list[Dict[str, Any]] = []
+    # Balances are logged for audit trail; stop paging once every watched currency is seen
+    remaining = set(_WATCHED_CURRENCIES)
+    balances: Dict[str, str] = {}
+    account_count = 0
     cursor = None
     
+    # Process each page as it arrives rather than collecting every account first
     while True:
         # Add cursor parameter if we have one
         params = {"limit": 250}
         if cursor:
             params["cursor"] = cursor
         
-        response = requests.get(url, headers=headers, params=params, timeout=30)
+        response = _get_session().get(url, headers=headers, params=params, timeout=30)
         response.raise_for_status()
-        result = response.json()
+        result = orjson.loads(response.content)
         
-        # Collect accounts from this page
-        accounts = result.get("accounts", [])
-        all_accounts.extend(accounts)
+        for account in result.get("accounts", []):
+            account_count += 1
+            currency = account.get("currency", "???")
+            if currency not in remaining:
+                continue
+            
+            available_balance = account.get("available_balance", {})
+            balance_value = available_balance.get("value", "0")
+            balance_currency = available_balance.get("currency", currency)
+            balances[currency] = f"{balance_value} {balance_currency}"
+            remaining.discard(currency)
+            if not remaining:
+                break
+        
+        if not remaining:
+            break
         
         # Check if there are more pages
         has_next = result.get("has_next", False)
@@ -510,27 +818,13 @@ def verify_coinbase_connection(api_base_url: Optional[str] = None) -> Dict[str,
         if not cursor:
             break
         
-        logging.debug(f"Fetching next page of accounts (cursor: {cursor})")
+        logging.debug("Fetching next page of accounts (cursor: %s)", cursor)
     
     # Log account information
-    logging.info(f"Coinbase API connection verified successfully!")
-    logging.info(f"Found {len(all_accounts)} account(s) total")
-    
-    # Log balances for audit trail
-    currencies = set(["BTC", "ETH", "USD", "USDC", "LTC", "BCH", "XRP", "ADA", "DOT", "SOL", "APT", "EUR"])
-    balances: Dict[str, str] = {}
-    for account in all_accounts:
-        currency = account.get("currency", "???")
-        if currency not in currencies:
-            continue
-
-        available_balance = account.get("available_balance", {})
-        balance_value = available_balance.get("value", "0")
-        balance_currency = available_balance.get("currency", currency)
-        logging.info(f"  - {currency}: {balance_value} {balance_currency} available")
-        balances[currency] = f"{balance_value} {balance_currency}"
-    
-    logging.debug(f"Total accounts fetched: {len(all_accounts)}")
+    logging.info("Coinbase API connection verified successfully!")
+    logging.info("Scanned %s account(s)", account_count)
+    for currency, balance in balances.items():
+        logging.info("  - %s: %s available", currency, balance)
     
     return balances
 
@@ -1,64 +1,193 @@
 import azure.functions as func
+import hmac
 import json
 import logging
 import os
-from typing import Any, Dict, Optional, cast
-from validate import check_headers, validate_payload, DRY_RUN_MODE
-from exchanges import place_order, verify_coinbase_connection
-from notifications import send_telegram_message
+import threading
+import time
+import orjson
+from typing import Any, Callable, Dict, Optional, Tuple, cast
+from validate import check_headers, get_config, parse_cert_subject, validate_payload
+# Exchange modules load on first attribute access (see exchanges._LAZY_EXPORTS), so the
+# Coinbase client is only imported once an order or connectivity check needs it
+import exchanges
+from notifications import queue_telegram_message
+from rate_limiter import RateLimiter, RATE_LIMIT_MAX_CALLS, RATE_LIMIT_WINDOW_SECONDS
 
 app = func.FunctionApp()
 
+# Per-client-IP webhook rate limiter (shared across invocations on a warm instance)
+_rate_limiter = RateLimiter(RATE_LIMIT_MAX_CALLS, RATE_LIMIT_WINDOW_SECONDS)
+
 # Startup check: Verify Coinbase connectivity
 _coinbase_verified = False
 
+# Last successful connectivity check as (monotonic time, balances), reused for _VERIFY_CACHE_TTL_SECONDS
+_VERIFY_CACHE_TTL_SECONDS = 30.0
+_verify_cache: Optional[Tuple[float, Dict[str, Any]]] = None
+_verify_lock = threading.Lock()
+
+# Validated payload fields echoed back in successful webhook responses
+_ECHO_KEYS = ("symbol", "action", "quantity", "quantity_type", "close")
+
+# Constant parts of the webhook success responses (copied per response, never mutated)
+_DRY_RUN_RESPONSE: Dict[str, Any] = {
+    "status": "success",
+    "message": "Webhook received and validated (DRY RUN - no order placed)",
+    "dry_run": True,
+}
+_ORDER_PLACED_RESPONSE: Dict[str, Any] = {
+    "status": "success",
+    "message": "Order placed successfully",
+}
+
+# Order audit log messages, each logged as a single multi-line record
+_SEP = "=" * 80
+_ORDER_PLACED_LOG = (
+    "%s\nORDER PLACED SUCCESSFULLY\nOrder ID: %s\nProduct: %s\nSide: %s\n"
+    "Webhook Data: action=%s, quantity=%s, quantity_type=%s, close_price=%s\n"
+    "Full API Response: %s\n%s"
+)
+_ORDER_FAILED_LOG = "%s\nORDER PLACEMENT FAILED\nError: %s\nError Type: %s\nWebhook Data: %s\n%s"
+
+# Pre-serialized bodies for responses whose content never changes
+_RATE_LIMITED_BODY = orjson.dumps({"error": "Rate limit exceeded"})
+_INVALID_JSON_BODY = orjson.dumps({"error": "Invalid JSON payload"})
+
+# Warm the Coinbase authenticator, tokens and connection while the worker loads (opt-in).
+# Separate from COINBASE_WARM_JWT, which exchanges.coinbase reads for its background token warmer.
+COINBASE_WARM_START = os.getenv("COINBASE_WARM_START", "false").lower() in ("1", "true")
+
 # Get password from environment (if empty, no password check needed)
 WEBHOOK_PASSWORD = os.getenv("WEBHOOK_PASSWORD", "")
 
 
-def check_password(req: func.HttpRequest) -> tuple[bool, Optional[str]]:
+def _bearer_password(req: func.HttpRequest, req_body: Optional[Any]) -> Optional[str]:
+    """Password from an 'Authorization: Bearer <password>' header."""
+    auth_header: Optional[str] = req.headers.get('Authorization')
+    if auth_header and auth_header.startswith('Bearer '):
+        return auth_header[7:]  # Remove 'Bearer ' prefix
+    return None
+
+
+def _body_password(req: func.HttpRequest, req_body: Optional[Any]) -> Any:
+    """Password from the 'password' field of a JSON object body."""
+    return req_body.get('password') if isinstance(req_body, dict) else None
+
+
+# Password sources in the order they are checked; each is only read if the ones before it fail.
+# Headers are read straight from the request mapping: its lookups are case-insensitive,
+# whereas a dict() copy has lower-cased keys that 'Authorization' would never match.
+_PASSWORD_SOURCES: tuple[Callable[[func.HttpRequest, Optional[Any]], Any], ...] = (
+    _bearer_password,
+    lambda req, req_body: req.headers.get('X-Webhook-Password'),
+    lambda req, req_body: req.params.get('password'),
+    _body_password,
+)
+
+
+def _json_response(body: bytes, status_code: int) -> func.HttpResponse:
     """
-    Check if the request has the correct password.
+    Build a JSON HTTP response.
     
     Args:
-        req: HTTP request object
+        body: Serialized JSON body
+        status_code: HTTP status code
         
     Returns:
-        Tuple of (is_valid, error_message)
+        HttpResponse with an application/json mimetype
     """
-    # If no password is configured, allow all requests
-    if not WEBHOOK_PASSWORD:
-        return True, None
+    return func.HttpResponse(body, status_code=status_code, mimetype="application/json")
+
+
+def _allow_without_password(req: func.HttpRequest, req_body: Optional[Any] = None) -> tuple[bool, Optional[str]]:
+    """Password checker used when no password is configured: every request is allowed."""
+    return True, None
+
+
+def _make_password_checker(password: str) -> Callable[..., tuple[bool, Optional[str]]]:
+    """
+    Build the request password checker for a configured password.
     
-    # Check for password in Authorization header (Bearer token style)
-    headers: dict[str, str] = dict(req.headers)  # Explicit type for headers
-    auth_header: Optional[str] = headers.get('Authorization')
-    if auth_header and auth_header.startswith('Bearer '):
-        token: str = auth_header[7:]  # Remove 'Bearer ' prefix
-        if token == WEBHOOK_PASSWORD:
-            return True, None
+    Args:
+        password: Expected webhook password (empty to allow all requests)
+        
+    Returns:
+        Function taking (req, req_body=None) and returning (is_valid, error_message)
+    """
+    if not password:
+        return _allow_without_password
+    
+    # Bound once here so each call reads closure variables rather than module globals
+    expected = password.encode()
+    sources = _PASSWORD_SOURCES
+    
+    def check_password(req: func.HttpRequest, req_body: Optional[Any] = None) -> tuple[bool, Optional[str]]:
+        """
+        Check if the request has the correct password.
+        
+        Args:
+            req: HTTP request object
+            req_body: Already-parsed JSON body (if any), checked for a 'password' field
+            
+        Returns:
+            Tuple of (is_valid, error_message)
+        """
+        for source in sources:
+            candidate = source(req, req_body)
+            # Compare in constant time; non-string values (e.g. a numeric body field) never match
+            if isinstance(candidate, str) and hmac.compare_digest(candidate.encode(), expected):
+                return True, None
 
-    # Check for password in custom X-Webhook-Password header
-    password_header: Optional[str] = headers.get('X-Webhook-Password')
-    if password_header == WEBHOOK_PASSWORD:
-        return True, None
+        return False, "Unauthorized: Invalid or missing password"
+    
+    return check_password
 
-    # Check for password in query parameter
-    password_param: Optional[str] = req.params.get('password')
-    if password_param == WEBHOOK_PASSWORD:
-        return True, None
 
-    # Check for password in request body
-    try:
-        req_body: Dict[str, Any] = req.get_json()
-        body_password: Optional[str] = req_body.get('password')
-        if body_password == WEBHOOK_PASSWORD:
-            return True, None
-    except (ValueError, AttributeError):
-        # If body is not JSON or can't be parsed, continue to other checks
-        pass
+# The password configuration is fixed for the worker's lifetime, so build the checker once
+check_password = _make_password_checker(WEBHOOK_PASSWORD)
+
+
+def _verify_connection_cached() -> Dict[str, Any]:
+    """
+    Verify Coinbase connectivity, reusing a successful result for _VERIFY_CACHE_TTL_SECONDS.
+    
+    The lock only guards the cache, never the Coinbase call: a slow response must not leave
+    concurrent probes blocked on it, holding the worker threads arbWebhook needs. Probes that
+    miss the cache together may each call Coinbase. Failures are not cached.
+    
+    Returns:
+        Dictionary of available balances per currency
+    """
+    global _verify_cache
+    
+    now = time.monotonic()
+    with _verify_lock:
+        cached = _verify_cache
+    if cached is not None and now - cached[0] < _VERIFY_CACHE_TTL_SECONDS:
+        logging.debug("Using cached Coinbase connectivity result")
+        return cached[1]
+    
+    result = exchanges.verify_coinbase_connection()
+    with _verify_lock:
+        _verify_cache = (now, result)
+    return result
 
-    return False, "Unauthorized: Invalid or missing password"
+
+def load_json_body(req: func.HttpRequest) -> Optional[Any]:
+    """
+    Decode the request body as JSON using orjson.
+    
+    Args:
+        req: HTTP request object
+        
+    Returns:
+        Decoded JSON value, or None if the body is empty or not valid JSON
+    """
+    try:
+        return orjson.loads(req.get_body())
+    except orjson.JSONDecodeError:
+        return None
 
 
 @app.route(route="arbWebhook", auth_level=func.AuthLevel.ANONYMOUS, methods=["POST"])
@@ -66,123 +195,97 @@ def arbWebhook(req: func.HttpRequest) -> func.HttpResponse:
     setup_logging()
     logging.info('TradingView webhook request received')
     
-    # Debug logging for request details
-    logging.debug(f"Request URL: {req.url}")
-    logging.debug(f"Request method: {req.method}")
-    logging.debug(f"Request headers: {dict(req.headers)}")
-    try:
-        req_body_debug = req.get_json()
-        logging.debug(f"Request body: {json.dumps(req_body_debug, indent=2)}")
-    except (ValueError, AttributeError) as debug_err:
-        logging.debug(f"Could not parse request body for debug logging: {debug_err}")
+    # Debug logging for request details (skip copying the headers unless DEBUG is on)
+    debug_enabled = logging.getLogger().isEnabledFor(logging.DEBUG)
+    if debug_enabled:
+        logging.debug("Request URL: %s", req.url)
+        logging.debug("Request method: %s", req.method)
+        logging.debug("Request headers: %s", dict(req.headers))
 
-    # Telegram helper available at module scope: `send_telegram_message`
+    # Parse the body once; it is reused for the password check and validation
+    req_body: Optional[Any] = load_json_body(req)
+    if debug_enabled:
+        logging.debug("Request body: %s", orjson.dumps(req_body, option=orjson.OPT_INDENT_2).decode())
+
+    # Telegram notifications are queued in the background: `queue_telegram_message`
     
     # Check password first
-    password_valid, password_error = check_password(req)
+    password_valid, password_error = check_password(req, req_body)
     if not password_valid:
-        logging.error(f"Password check failed: {password_error}")
+        logging.error("Password check failed: %s", password_error)
         forwarded_for: str = cast(str, req.headers.get('X-Forwarded-For', 'unknown'))  # type: ignore[call-overload]
-        logging.debug(f"Failed password check from IP: {forwarded_for}")
-        return func.HttpResponse(
-            json.dumps({"error": password_error}),
-            status_code=401,
-            mimetype="application/json"
-        )
+        logging.debug("Failed password check from IP: %s", forwarded_for)
+        return _json_response(orjson.dumps({"error": password_error}), 401)
     
     # Get client IP
     x_forwarded_for = cast(Optional[str], req.headers.get('X-Forwarded-For'))  # type: ignore[call-overload]
     client_ip: Optional[str] = None
     if x_forwarded_for:
-        client_ip = x_forwarded_for.split(',')[0].strip()
+        # First hop is the client; partition stops at the first comma without building a list
+        client_ip = x_forwarded_for.partition(',')[0].strip()
     if not client_ip:
         x_real_ip = cast(Optional[str], req.headers.get('X-Real-IP'))  # type: ignore[call-overload]
         if x_real_ip:
             client_ip = x_real_ip
     
-    # Extract client certificate information if available
+    # Extract client certificate information if available (only needed when the cert check is on)
     # Azure Functions may provide cert info via headers or context
+    config = get_config()
     client_cert: Optional[Dict[str, str]] = None
-    cert_subject = cast(Optional[str], req.headers.get('X-ARR-ClientCert-Subject'))  # type: ignore[call-overload]
-    if cert_subject:
-        # Parse certificate subject string (format: "C=US, ST=Ohio, L=Westerville, ...")
-        client_cert = {}
-        for part in cert_subject.split(','):
-            part = part.strip()
-            if '=' in part:
-                key, value = part.split('=', 1)
-                client_cert[key.strip()] = value.strip()
+    if config.cert_check:
+        cert_subject = cast(Optional[str], req.headers.get('X-ARR-ClientCert-Subject'))  # type: ignore[call-overload]
+        if cert_subject:
+            client_cert = parse_cert_subject(cert_subject)
     
     # Validate headers, IP, and certificate
-    headers_valid, headers_error = check_headers(dict(req.headers), client_ip, client_cert)
+    headers_valid, headers_error = check_headers(req.headers, client_ip, client_cert)
     if not headers_valid:
-        logging.error(f"Header validation failed: {headers_error}")
-        return func.HttpResponse(
-            json.dumps({"error": headers_error}),
-            status_code=403,
-            mimetype="application/json"
-        )
+        logging.error("Header validation failed: %s", headers_error)
+        return _json_response(orjson.dumps({"error": headers_error}), 403)
     
-    # Parse request body
-    try:
-        req_body: Dict[str, Any] = req.get_json()
-    except ValueError as e:
-        logging.error(f"Invalid JSON payload: {e}")
-        return func.HttpResponse(
-            json.dumps({"error": "Invalid JSON payload"}),
-            status_code=400,
-            mimetype="application/json"
-        )
+    # Shed bursts from allowed clients before payload validation and order placement (after the
+    # IP whitelist, so rejected clients never add rate limiter entries)
+    if not _rate_limiter.check(client_ip or "anon"):
+        logging.warning("Rate limit exceeded for client: %s", client_ip or 'anon')
+        return _json_response(_RATE_LIMITED_BODY, 429)
+    
+    # Reject bodies that are not a JSON object
+    if not isinstance(req_body, dict):
+        logging.error("Invalid JSON payload: request body is not a JSON object")
+        return _json_response(_INVALID_JSON_BODY, 400)
     
     # Validate payload
     payload_valid, payload_error = validate_payload(req_body)
     if not payload_valid:
-        logging.error(f"Payload validation failed: {payload_error}")
-        return func.HttpResponse(
-            json.dumps({"error": payload_error}),
-            status_code=400,
-            mimetype="application/json"
-        )
+        logging.error("Payload validation failed: %s", payload_error)
+        return _json_response(orjson.dumps({"error": payload_error}), 400)
     
     # Log the validated webhook data
-    logging.info(f"Valid webhook received - Symbol: {req_body['symbol']}, "
-                f"Action: {req_body['action']}, Quantity: {req_body['quantity']}")
+    logging.info("Valid webhook received - Symbol: %s, Action: %s, Quantity: %s",
+                 req_body['symbol'], req_body['action'], req_body['quantity'])
     
     # Check if in dry-run mode
-    if DRY_RUN_MODE:
+    if config.dry_run:
         logging.info("DRY RUN MODE: Skipping actual order processing")
         # Notify via Telegram about dry-run webhook receipt (include payload)
         try:
             body_json = json.dumps(req_body, indent=2)
-            send_telegram_message(
+            queue_telegram_message(
                 f"DRY RUN: Webhook validated - {req_body['symbol']} {req_body['action']} {req_body['quantity']} {req_body['quantity_type']} close={req_body['close']}\n\n{body_json}"
             )
         except Exception:
             pass
 
-        return func.HttpResponse(
-            json.dumps({
-                "status": "success",
-                "message": "Webhook received and validated (DRY RUN - no order placed)",
-                "dry_run": True,
-                "data": {
-                    "symbol": req_body["symbol"],
-                    "action": req_body["action"],
-                    "quantity": req_body["quantity"],
-                    "quantity_type": req_body["quantity_type"],
-                    "close": req_body["close"]
-                }
-            }),
-            status_code=200,
-            mimetype="application/json"
+        return _json_response(
+            orjson.dumps({**_DRY_RUN_RESPONSE, "data": {key: req_body[key] for key in _ECHO_KEYS}}), 200
         )
     
     # Place order on Coinbase
     try:
-        logging.info(f"Attempting to place order: {req_body['action']} {req_body['quantity']} "
-                    f"{req_body['quantity_type']} of {req_body['symbol']} at close={req_body['close']}")
+        logging.info("Attempting to place order: %s %s %s of %s at close=%s", req_body['action'],
+                     req_body['quantity'], req_body['quantity_type'], req_body['symbol'], req_body['close'])
         
-        order_result = place_order(
+        order_result = exchanges.place_order(
             symbol=req_body["symbol"],
             action=req_body["action"],
             quantity_type=req_body["quantity_type"],
@@ -196,69 +299,47 @@ def arbWebhook(req: func.HttpRequest) -> func.HttpResponse:
         product_id = success_response.get("product_id", req_body["symbol"])
         side = success_response.get("side", req_body["action"])
         
-        # Log complete order result for audit trail
-        logging.info("="*80)
-        logging.info(f"ORDER PLACED SUCCESSFULLY")
-        logging.info(f"Order ID: {order_id}")
-        logging.info(f"Product: {product_id}")
-        logging.info(f"Side: {side}")
-        logging.info(f"Webhook Data: action={req_body['action']}, quantity={req_body['quantity']}, "
-                    f"quantity_type={req_body['quantity_type']}, close_price={req_body['close']}")
-        logging.info(f"Full API Response: {json.dumps(order_result, indent=2)}")
-        logging.info("="*80)
+        # Log complete order result for audit trail (skip the pretty-print if INFO is filtered out)
+        if logging.getLogger().isEnabledFor(logging.INFO):
+            logging.info(
+                _ORDER_PLACED_LOG,
+                _SEP, order_id, product_id, side,
+                req_body['action'], req_body['quantity'], req_body['quantity_type'], req_body['close'],
+                orjson.dumps(order_result).decode(), _SEP
+            )
         
         # Send Telegram notification with order result (include full API response)
         try:
             result_json = json.dumps(order_result, indent=2)
-            send_telegram_message(
+            queue_telegram_message(
                 f"Order placed: {side} {req_body['quantity']} {req_body['quantity_type']} of {product_id} - Order ID: {order_id}\n\nResult:\n{result_json}"
             )
         except Exception:
             pass
 
-        return func.HttpResponse(
-            json.dumps({
-                "status": "success",
-                "message": "Order placed successfully",
-                "order_id": order_id,
-                "data": {
-                    "symbol": req_body["symbol"],
-                    "action": req_body["action"],
-                    "quantity": req_body["quantity"],
-                    "quantity_type": req_body["quantity_type"],
-                    "close": req_body["close"]
-                }
-            }),
-            status_code=200,
-            mimetype="application/json"
-        )
+        return _json_response(orjson.dumps({
+            **_ORDER_PLACED_RESPONSE,
+            "order_id": order_id,
+            "data": {key: req_body[key] for key in _ECHO_KEYS}
+        }), 200)
     except Exception as e:
-        # Log detailed error information
-        logging.error("="*80)
-        logging.error(f"ORDER PLACEMENT FAILED")
-        logging.error(f"Error: {str(e)}")
-        logging.error(f"Error Type: {type(e).__name__}")
-        logging.error(f"Webhook Data: {json.dumps(req_body, indent=2)}")
-        logging.error("="*80)
-        logging.exception("Full exception traceback:", exc_info=True)
+        # Log detailed error information as one record, followed by the traceback
+        logging.error(_ORDER_FAILED_LOG, _SEP, e, type(e).__name__, orjson.dumps(req_body).decode(), _SEP,
+                      exc_info=True)
         
         # Send Telegram notification with error and request payload
         try:
             body_json = json.dumps(req_body, indent=2)
-            send_telegram_message(
+            queue_telegram_message(
                 f"Order placement FAILED: {str(e)}\n\nRequest:\n{body_json}"
             )
         except Exception:
             pass
 
-        return func.HttpResponse(
-            json.dumps({
-                "status": "error",
-                "message": f"Failed to place order: {str(e)}"
-            }),
-            status_code=500,
-            mimetype="application/json"
-        )
+        return _json_response(orjson.dumps({
+            "status": "error",
+            "message": f"Failed to place order: {str(e)}"
+        }), 500)
 
 
 @app.route(route="webhookVerifyConnectivity", auth_level=func.AuthLevel.ANONYMOUS, methods=["GET", "POST"])
@@ -266,32 +347,22 @@ def webhookVerifyConnectivity(req: func.HttpRequest) -> func.HttpResponse:
     setup_logging()
     logging.info('Connectivity verification request received')
     forwarded_for: str = cast(str, req.headers.get('X-Forwarded-For', 'unknown'))  # type: ignore[call-overload]
-    logging.debug(f"Verification request from: {forwarded_for}")
+    logging.debug("Verification request from: %s", forwarded_for)
     
     # Check password first
-    password_valid, password_error = check_password(req)
+    password_valid, password_error = check_password(req, load_json_body(req))
     if not password_valid:
-        logging.error(f"Password check failed: {password_error}")
-        return func.HttpResponse(
-            json.dumps({"error": password_error}),
-            status_code=401,
-            mimetype="application/json"
-        )
+        logging.error("Password check failed: %s", password_error)
+        return _json_response(orjson.dumps({"error": password_error}), 401)
     
     try:
-        result: Dict[str, str] = verify_coinbase_connection()
-        return func.HttpResponse(
-            json.dumps({"status": "success", "message": "Coinbase connectivity verified",
-                        "result": result}),
-            status_code=200,
-            mimetype="application/json"
-        )
+        result = _verify_connection_cached()
+        return _json_response(orjson.dumps({"status": "success", "message": "Coinbase connectivity verified",
+                                            "result": result}), 200)
     except Exception as e:
         logging.exception("Coinbase connectivity verification failed:", exc_info=True)
-        return func.HttpResponse(
-            json.dumps({"status": "error", "message": f"Failed to verify Coinbase connectivity: {str(e)}"}, exec_info=True),
-            status_code=500,
-            mimetype="application/json"
+        return _json_response(
+            orjson.dumps({"status": "error", "message": f"Failed to verify Coinbase connectivity: {str(e)}"}), 500
         )
 
 def setup_logging():
@@ -321,3 +392,6 @@ def setup_logging():
     handler.setFormatter(formatter)
     root_logger.addHandler(handler)
 
+
+if COINBASE_WARM_START:
+    exchanges.warm_up_coinbase()
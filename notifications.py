@@ -1,14 +1,42 @@
 import os
 import logging
-from typing import Dict
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Optional
 
 import requests
+from requests.adapters import HTTPAdapter
 
 # Read once at import time; environment can be updated if needed and process restarted.
 TELEGRAM_TOKEN = os.getenv("TELEGRAM_TOKEN")
 TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
 MAX_TELEGRAM_MESSAGE = 4096
 
+# sendMessage endpoint for the configured bot (built once rather than per message)
+_SEND_MESSAGE_URL = f"https://api.telegram.org/bot{TELEGRAM_TOKEN}/sendMessage"
+
+# Shared HTTP session (created lazily) so warm invocations reuse the Telegram TLS connection
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+# Background sender so webhook responses don't wait on the Telegram round trip
+_notify_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="telegram")
+
+
+def _get_session() -> requests.Session:
+    """Get or create the shared requests.Session used for Telegram API calls."""
+    global _session
+
+    # Double-checked: both _notify_pool threads may send the first messages concurrently
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
+                _session = session
+
+    return _session
+
 
 def send_telegram_message(text: str) -> None:
     """Send a plain-text message to the configured Telegram chat.
@@ -20,18 +48,27 @@ def send_telegram_message(text: str) -> None:
         logging.info("TELEGRAM_TOKEN or TELEGRAM_CHAT_ID not set; skipping Telegram notification.")
         return
 
-    url = f"https://api.telegram.org/bot{TELEGRAM_TOKEN}/sendMessage"
     payload: Dict[str, str] = {"chat_id": TELEGRAM_CHAT_ID, "text": text}
 
     # Truncate message if it exceeds Telegram's maximum message length
     if len(text) > MAX_TELEGRAM_MESSAGE:
         truncated = text[: MAX_TELEGRAM_MESSAGE - 3] + "..."
-        logging.info(f"Telegram message length {len(text)} exceeds {MAX_TELEGRAM_MESSAGE}, truncating to {len(truncated)} chars")
+        logging.info("Telegram message length %s exceeds %s, truncating to %s chars",
+                     len(text), MAX_TELEGRAM_MESSAGE, len(truncated))
         payload["text"] = truncated
 
     try:
-        resp = requests.post(url, json=payload, timeout=5)
+        resp = _get_session().post(_SEND_MESSAGE_URL, json=payload, timeout=5)
         if resp.status_code != 200:
-            logging.warning(f"Telegram sendMessage failed: {resp.status_code} {resp.text}")
+            logging.warning("Telegram sendMessage failed: %s %s", resp.status_code, resp.text)
     except Exception as e:
-        logging.warning(f"Telegram sendMessage error: {e}")
+        logging.warning("Telegram sendMessage error: %s", e)
+
+
+def queue_telegram_message(text: str) -> "Future[None]":
+    """Send a Telegram message on a background thread without waiting for it.
+
+    Returns the Future for callers that want to wait (e.g. tests); the webhook
+    handler ignores it. Failures are logged by send_telegram_message.
+    """
+    return _notify_pool.submit(send_telegram_message, text)
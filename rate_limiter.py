@@ -0,0 +1,69 @@
+"""
+Sliding-window rate limiting for incoming webhook requests.
+"""
+from collections import OrderedDict, deque
+from typing import Deque
+import os
+import threading
+import time
+
+# Environment variables for rate limiting; opt-in (RATE_LIMIT_MAX_CALLS=0, the default, disables it)
+# because TradingView sends every user's alerts from a few shared IPs
+RATE_LIMIT_MAX_CALLS = int(os.getenv("RATE_LIMIT_MAX_CALLS", "0"))
+RATE_LIMIT_WINDOW_SECONDS = float(os.getenv("RATE_LIMIT_WINDOW_SECONDS", "60"))
+
+# Maximum number of tracked callers; the least recently seen caller is evicted beyond this,
+# so spoofed X-Forwarded-For values cannot grow the table (or the per-call cost) without bound
+_MAX_TRACKED_CALLERS = 1024
+
+
+class RateLimiter:
+    """Allow at most max_calls per caller within a sliding window of window_s seconds."""
+
+    def __init__(self, max_calls: int = 10, window_s: float = 60.0):
+        """
+        Initialize the rate limiter.
+
+        Args:
+            max_calls: Maximum calls allowed per caller within the window (0 or less disables limiting)
+            window_s: Window length in seconds
+        """
+        self.max_calls = max_calls
+        self.window_s = window_s
+        self._calls: "OrderedDict[str, Deque[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def check(self, caller: str) -> bool:
+        """
+        Record a call for the caller if it is within its limit.
+
+        Args:
+            caller: Caller identifier (e.g. client IP)
+
+        Returns:
+            True if the call is allowed, False if the caller is rate limited
+        """
+        if self.max_calls <= 0:
+            return True
+
+        now = time.monotonic()
+        cutoff = now - self.window_s
+
+        with self._lock:
+            calls = self._calls.get(caller)
+            if calls is None:
+                if len(self._calls) >= _MAX_TRACKED_CALLERS:
+                    self._calls.popitem(last=False)
+                calls = self._calls[caller] = deque()
+            else:
+                self._calls.move_to_end(caller)
+
+            # Drop timestamps that have left the window
+            while calls and calls[0] <= cutoff:
+                calls.popleft()
+
+            if len(calls) >= self.max_calls:
+                return False
+
+            calls.append(now)
+            return True
@@ -1,30 +1,47 @@
 """
 Test script to verify exchange authentication package structure.
+
+Run directly (python test_exchanges.py); importing it has no side effects.
 """
+import importlib.util
 import sys
 import os
 
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from exchanges import ExchangeAuthenticator
 
-# Test the protocol
-print("✓ ExchangeAuthenticator protocol imported successfully")
+def main() -> None:
+    """Check the exchange modules resolve, then import their public names."""
+    # Resolve the modules first without executing them
+    for module_name in ("exchanges", "exchanges.coinbase", "exchanges.kraken"):
+        if importlib.util.find_spec(module_name) is None:
+            print(f"✗ Module {module_name} not found")
+            sys.exit(1)
+    print("✓ Exchange modules found")
+
+    from exchanges import ExchangeAuthenticator
+
+    # Test the protocol
+    print("✓ ExchangeAuthenticator protocol imported successfully")
+
+    try:
+        from exchanges import get_coinbase_authenticator
+        print("✓ get_coinbase_authenticator imported successfully")
+    except ImportError as e:
+        print(f"✗ Failed to import get_coinbase_authenticator: {e}")
+
+    try:
+        from exchanges import get_kraken_authenticator
+        print("✓ get_kraken_authenticator imported successfully")
+    except ImportError as e:
+        print(f"✗ Failed to import get_kraken_authenticator: {e}")
 
-try:
-    from exchanges import get_coinbase_authenticator
-    print("✓ get_coinbase_authenticator imported successfully")
-except ImportError as e:
-    print(f"✗ Failed to import get_coinbase_authenticator: {e}")
+    print("\nPackage structure verified!")
+    print("\nAvailable exchanges:")
+    print("  - Coinbase (exchanges.coinbase)")
+    print("  - Kraken (exchanges.kraken) [placeholder]")
 
-try:
-    from exchanges import get_kraken_authenticator
-    print("✓ get_kraken_authenticator imported successfully")
-except ImportError as e:
-    print(f"✗ Failed to import get_kraken_authenticator: {e}")
 
-print("\nPackage structure verified!")
-print("\nAvailable exchanges:")
-print("  - Coinbase (exchanges.coinbase)")
-print("  - Kraken (exchanges.kraken) [placeholder]")
+if __name__ == "__main__":
+    main()
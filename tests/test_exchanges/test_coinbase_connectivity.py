@@ -1,6 +1,7 @@
 """
 Tests for Coinbase connectivity verification.
 """
+import orjson
 import pytest
 from unittest.mock import Mock, patch, MagicMock
 from exchanges.coinbase import verify_coinbase_connection
@@ -14,7 +15,7 @@ class TestVerifyCoinbaseConnection:
     def test_successful_verification(self, mock_requests_get: Mock, mock_authenticator: Mock) -> None:
         """Test successful connection verification."""
         mock_response = MagicMock()
-        mock_response.json.return_value = {
+        mock_response.content = orjson.dumps({
             "accounts": [
                 {
                     "uuid": "account-1",
@@ -34,7 +35,7 @@ class TestVerifyCoinbaseConnection:
                 }
             ],
             "has_next": False
-        }
+        })
         mock_requests_get.return_value = mock_response
         
         result = verify_coinbase_connection()
@@ -55,7 +56,7 @@ class TestVerifyCoinbaseConnection:
     def test_custom_api_base_url(self, mock_requests_get: Mock, mock_authenticator: Mock) -> None:
         """Test using custom API base URL."""
         mock_response = MagicMock()
-        mock_response.json.return_value = {"accounts": [], "has_next": False}
+        mock_response.content = orjson.dumps({"accounts": [], "has_next": False})
         mock_requests_get.return_value = mock_response
         
         verify_coinbase_connection(api_base_url="https://sandbox.coinbase.com")
@@ -64,6 +65,21 @@ class TestVerifyCoinbaseConnection:
         call_args = mock_requests_get.call_args
         assert call_args[0][0] == "https://sandbox.coinbase.com/api/v3/brokerage/accounts"
     
+    def test_base_url_path_is_signed(self, mock_requests_get: Mock, mock_authenticator: Mock) -> None:
+        """Test a path in the base URL is part of the signed request path as well as the URL."""
+        mock_response = MagicMock()
+        mock_response.content = orjson.dumps({"accounts": [], "has_next": False})
+        mock_requests_get.return_value = mock_response
+        
+        verify_coinbase_connection(api_base_url="https://proxy.example.com/coinbase")
+        
+        assert mock_requests_get.call_args[0][0] == "https://proxy.example.com/coinbase/api/v3/brokerage/accounts"
+        mock_authenticator.get_auth_headers.assert_called_once_with(
+            request_method="GET",
+            request_host="proxy.example.com",
+            request_path="/coinbase/api/v3/brokerage/accounts"
+        )
+    
     def test_http_error(self, mock_requests_get: Mock, mock_authenticator: Mock) -> None:
         """Test handling of HTTP errors."""
         import requests
@@ -74,10 +90,50 @@ class TestVerifyCoinbaseConnection:
         with pytest.raises(requests.HTTPError):
             verify_coinbase_connection()
     
+    def test_paginated_accounts(self, mock_requests_get: Mock, mock_authenticator: Mock) -> None:
+        """Test balances are collected across pages using the returned cursor."""
+        page1 = MagicMock()
+        page1.content = orjson.dumps({
+            "accounts": [{"currency": "USD", "available_balance": {"value": "10.00", "currency": "USD"}}],
+            "has_next": True,
+            "cursor": "page-2"
+        })
+        page2 = MagicMock()
+        page2.content = orjson.dumps({
+            "accounts": [{"currency": "BTC", "available_balance": {"value": "0.1", "currency": "BTC"}}],
+            "has_next": False
+        })
+        mock_requests_get.side_effect = [page1, page2]
+        
+        result = verify_coinbase_connection()
+        
+        assert result == {"USD": "10.00 USD", "BTC": "0.1 BTC"}
+        assert mock_requests_get.call_args_list[1][1]["params"]["cursor"] == "page-2"
+    
+    def test_stops_paging_when_all_currencies_found(self, mock_requests_get: Mock, mock_authenticator: Mock) -> None:
+        """Test no further pages are fetched once every watched currency has a balance."""
+        from exchanges.coinbase import _WATCHED_CURRENCIES
+        
+        mock_response = MagicMock()
+        mock_response.content = orjson.dumps({
+            "accounts": [
+                {"currency": currency, "available_balance": {"value": "1", "currency": currency}}
+                for currency in sorted(_WATCHED_CURRENCIES)
+            ],
+            "has_next": True,
+            "cursor": "page-2"
+        })
+        mock_requests_get.return_value = mock_response
+        
+        result = verify_coinbase_connection()
+        
+        mock_requests_get.assert_called_once()
+        assert result.keys() == _WATCHED_CURRENCIES
+    
     def test_empty_accounts(self, mock_requests_get: Mock, mock_authenticator: Mock) -> None:
         """Test handling of empty accounts list."""
         mock_response = MagicMock()
-        mock_response.json.return_value = {"accounts": [], "has_next": False}
+        mock_response.content = orjson.dumps({"accounts": [], "has_next": False})
         mock_requests_get.return_value = mock_response
         
         result = verify_coinbase_connection()
@@ -88,7 +144,7 @@ class TestVerifyCoinbaseConnection:
     def test_authenticator_headers_used(self, mock_requests_get: Mock, mock_authenticator: Mock) -> None:
         """Test that authenticator headers are used in request."""
         mock_response = MagicMock()
-        mock_response.json.return_value = {"accounts": [], "has_next": False}
+        mock_response.content = orjson.dumps({"accounts": [], "has_next": False})
         mock_requests_get.return_value = mock_response
         
         verify_coinbase_connection()
@@ -102,8 +158,8 @@ class TestVerifyCoinbaseConnection:
 
 @pytest.fixture
 def mock_requests_get() -> Any:
-    """Mock the requests.get function."""
-    with patch('requests.get') as mock_get:
+    """Mock GET requests made through the shared session."""
+    with patch('requests.Session.get') as mock_get:
         yield mock_get
 
 
@@ -1,30 +1,28 @@
 """
 Tests for Coinbase order placement functionality.
 """
+import orjson
 import pytest
+import requests
+from types import SimpleNamespace
 from unittest.mock import Mock, patch, MagicMock
-from exchanges.coinbase import place_order
+from exchanges.coinbase import (
+    place_order,
+    format_symbol_for_coinbase,
+    _decimals_from_increment,
+    _format_quantity,
+    _get_product_precision
+)
 
-from typing import Any, Tuple
+from typing import Any, Dict, Tuple
 
 
 class TestPlaceOrder:
     """Test the place_order function."""
     
+    @pytest.mark.canned("buy_btc")
     def test_buy_with_cash(self, mock_requests: Mock, mock_authenticator: Mock, mock_product_precision: Mock) -> None:
         """Test buying with cash amount - now converts to units based on price."""
-        # Setup mock response
-        mock_response = MagicMock()
-        mock_response.json.return_value = {
-            "success": True,
-            "success_response": {
-                "order_id": "test-order-123",
-                "product_id": "BTC-USD",
-                "side": "BUY"
-            }
-        }
-        mock_requests.return_value = mock_response  # noqa: F841
-        
         # Call place_order with close_price for limit order
         # Buy $100 worth at $50,000/BTC should result in 0.002 BTC
         result = place_order("BTC-USD", "buy", "cash", 100.0, close_price=50000.0)
@@ -37,7 +35,7 @@ class TestPlaceOrder:
         assert call_args[0][0] == "https://api.coinbase.com/api/v3/brokerage/orders"
         
         # Check request body
-        request_body = call_args[1]["json"]
+        request_body = orjson.loads(call_args[1]["data"])
         assert request_body["product_id"] == "BTC-USD"
         assert request_body["side"] == "BUY"
         assert "limit_limit_gtc" in request_body["order_configuration"]
@@ -50,24 +48,14 @@ class TestPlaceOrder:
         assert result["success"] is True
         assert result["success_response"]["order_id"] == "test-order-123"
     
+    @pytest.mark.canned("buy_eth")
     def test_buy_with_units(self, mock_requests: Mock, mock_authenticator: Mock, mock_product_precision: Mock) -> None:
         """Test buying with crypto units (base_size)."""
-        mock_response = MagicMock()
-        mock_response.json.return_value = {
-            "success": True,
-            "success_response": {
-                "order_id": "test-order-456",
-                "product_id": "ETH-USD",
-                "side": "BUY"
-            }
-        }
-        mock_requests.return_value = mock_response  # noqa: F841
-        
         place_order("ETH-USD", "buy", "units", 0.5, close_price=3000.0)
         
         # Check request body
         call_args = mock_requests.call_args
-        request_body = call_args[1]["json"]
+        request_body = orjson.loads(call_args[1]["data"])
         assert request_body["product_id"] == "ETH-USD"
         assert request_body["side"] == "BUY"
         assert "limit_limit_gtc" in request_body["order_configuration"]
@@ -75,24 +63,14 @@ class TestPlaceOrder:
         assert request_body["order_configuration"]["limit_limit_gtc"]["limit_price"] == "3000"
         assert "quote_size" not in request_body["order_configuration"]["limit_limit_gtc"]
     
+    @pytest.mark.canned("sell_btc")
     def test_sell_with_units(self, mock_requests: Mock, mock_authenticator: Mock, mock_product_precision: Mock) -> None:
         """Test selling with crypto units (base_size)."""
-        mock_response = MagicMock()
-        mock_response.json.return_value = {
-            "success": True,
-            "success_response": {
-                "order_id": "test-order-789",
-                "product_id": "BTC-USD",
-                "side": "SELL"
-            }
-        }
-        mock_requests.return_value = mock_response  # noqa: F841
-        
         place_order("BTC-USD", "sell", "units", 0.001, close_price=50000.0)
         
         # Check request body
         call_args = mock_requests.call_args
-        request_body = call_args[1]["json"]
+        request_body = orjson.loads(call_args[1]["data"])
         assert request_body["product_id"] == "BTC-USD"
         assert request_body["side"] == "SELL"
         assert "limit_limit_gtc" in request_body["order_configuration"]
@@ -100,25 +78,15 @@ class TestPlaceOrder:
         assert request_body["order_configuration"]["limit_limit_gtc"]["limit_price"] == "50000"
         assert "quote_size" not in request_body["order_configuration"]["limit_limit_gtc"]
     
+    @pytest.mark.canned("sell_btc_cash")
     def test_sell_with_cash_and_close_price(self, mock_requests: Mock, mock_authenticator: Mock, mock_product_precision: Mock) -> None:
         """Test selling with cash amount calculates units from close price."""
-        mock_response = MagicMock()
-        mock_response.json.return_value = {
-            "success": True,
-            "success_response": {
-                "order_id": "test-order-cash-sell",
-                "product_id": "BTC-USD",
-                "side": "SELL"
-            }
-        }
-        mock_requests.return_value = mock_response  # noqa: F841
-        
         # Sell $100 worth at $50,000/BTC should result in 0.002 BTC
         place_order("BTC-USD", "sell", "cash", 100.0, close_price=50000.0)
         
         # Check request body
         call_args = mock_requests.call_args
-        request_body = call_args[1]["json"]
+        request_body = orjson.loads(call_args[1]["data"])
         assert request_body["product_id"] == "BTC-USD"
         assert request_body["side"] == "SELL"
         assert "limit_limit_gtc" in request_body["order_configuration"]
@@ -149,80 +117,192 @@ class TestPlaceOrder:
         with pytest.raises(ValueError, match="Invalid quantity_type: dollars"):
             place_order("BTC-USD", "buy", "dollars", 100.0)
     
+    @pytest.mark.canned("insufficient_funds")
     def test_api_error_response(self, mock_requests: Mock, mock_authenticator: Mock, mock_product_precision: Mock) -> None:
         """Test handling of API error response."""
-        mock_response = MagicMock()
-        mock_response.json.return_value = {
-            "success": False,
-            "error_response": {
-                "error": "INSUFFICIENT_FUNDS",
-                "message": "Insufficient funds",
-                "error_details": "Account balance too low"
-            }
-        }
-        mock_requests.return_value = mock_response  # noqa: F841
-        
         with pytest.raises(ValueError, match="Order failed: Insufficient funds"):
             place_order("BTC-USD", "buy", "cash", 10000.0, close_price=50000.0)
     
+    @pytest.mark.canned("unauthorized")
     def test_http_error(self, mock_requests: Mock, mock_authenticator: Mock, mock_product_precision: Mock) -> None:
         """Test handling of HTTP errors."""
-        import requests
-        mock_response = MagicMock()
-        mock_response.raise_for_status.side_effect = requests.HTTPError("401 Unauthorized")
-        mock_requests.return_value = mock_response
-        
         with pytest.raises(requests.HTTPError):
             place_order("BTC-USD", "buy", "cash", 100.0, close_price=50000.0)
     
+    @pytest.mark.canned("order_success")
     def test_custom_api_base_url(self, mock_requests: Mock, mock_authenticator: Mock, mock_product_precision: Mock) -> None:
         """Test using custom API base URL."""
-        mock_response = MagicMock()
-        mock_response.json.return_value = {
-            "success": True,
-            "success_response": {"order_id": "test-123"}
-        }
-        mock_requests.return_value = mock_response
-        
         # Cash is converted to units (100 / 50000 = 0.002)
         place_order("BTC-USD", "buy", "cash", 100.0, close_price=50000.0, api_base_url="https://sandbox.coinbase.com")
         
         # Check URL uses custom base
         call_args = mock_requests.call_args
         assert call_args[0][0] == "https://sandbox.coinbase.com/api/v3/brokerage/orders"
+        
+        # JWT is issued for the custom host
+        auth_kwargs = mock_authenticator.get_auth_headers.call_args[1]
+        assert auth_kwargs["request_host"] == "sandbox.coinbase.com"
     
+    @pytest.mark.canned("order_success")
     def test_case_insensitive_action(self, mock_requests: Mock, mock_authenticator: Mock, mock_product_precision: Mock) -> None:
         """Test that action is case-insensitive."""
-        mock_response = MagicMock()
-        mock_response.json.return_value = {
-            "success": True,
-            "success_response": {"order_id": "test-123"}
-        }
-        mock_requests.return_value = mock_response
-        
         # Test lowercase - cash is converted to units (100 / 50000 = 0.002)
         place_order("BTC-USD", "buy", "cash", 100.0, close_price=50000.0)
         call_args = mock_requests.call_args
-        assert call_args[1]["json"]["side"] == "BUY"
+        assert orjson.loads(call_args[1]["data"])["side"] == "BUY"
         
         # Test uppercase
         place_order("BTC-USD", "SELL", "units", 0.1, close_price=50000.0)
         call_args = mock_requests.call_args
-        assert call_args[1]["json"]["side"] == "SELL"
+        assert orjson.loads(call_args[1]["data"])["side"] == "SELL"
         
         # Test mixed case - cash is converted to units (50 / 50000 = 0.001)
         place_order("BTC-USD", "BuY", "cash", 50.0, close_price=50000.0)
         call_args = mock_requests.call_args
-        assert call_args[1]["json"]["side"] == "BUY"
+        assert orjson.loads(call_args[1]["data"])["side"] == "BUY"
 
 
-@pytest.fixture
-def mock_requests() -> Any:
-    """Mock the requests module."""
-    with patch('requests.post') as mock_post:
+# Order API response bodies, selected per test with @pytest.mark.canned("<label>")
+_CANNED_BODIES: Dict[str, Any] = {
+    "buy_btc": {"success": True, "success_response": {"order_id": "test-order-123", "product_id": "BTC-USD", "side": "BUY"}},
+    "buy_eth": {"success": True, "success_response": {"order_id": "test-order-456", "product_id": "ETH-USD", "side": "BUY"}},
+    "sell_btc": {"success": True, "success_response": {"order_id": "test-order-789", "product_id": "BTC-USD", "side": "SELL"}},
+    "sell_btc_cash": {
+        "success": True,
+        "success_response": {"order_id": "test-order-cash-sell", "product_id": "BTC-USD", "side": "SELL"}
+    },
+    "order_success": {"success": True, "success_response": {"order_id": "test-123"}},
+    "insufficient_funds": {
+        "success": False,
+        "error_response": {
+            "error": "INSUFFICIENT_FUNDS",
+            "message": "Insufficient funds",
+            "error_details": "Account balance too low"
+        }
+    },
+}
+
+
+def _raise_unauthorized() -> None:
+    raise requests.HTTPError("401 Unauthorized")
+
+
+@pytest.fixture(scope="session")
+def canned_responses() -> Dict[str, SimpleNamespace]:
+    """Build each canned order API response once per test session."""
+    responses = {
+        label: SimpleNamespace(content=orjson.dumps(body), raise_for_status=lambda: None)
+        for label, body in _CANNED_BODIES.items()
+    }
+    responses["unauthorized"] = SimpleNamespace(content=b"", raise_for_status=_raise_unauthorized)
+    return responses
+
+
+@pytest.fixture(scope="module")
+def _session_post_patch() -> Any:
+    """Patch Session.post once for the module; mock_requests resets it per test."""
+    with patch('requests.Session.post') as mock_post:
         yield mock_post
 
 
+@pytest.fixture
+def mock_requests(
+    request: pytest.FixtureRequest,
+    canned_responses: Dict[str, SimpleNamespace],
+    _session_post_patch: Mock
+) -> Any:
+    """Mock POST requests made through the shared session, returning the test's canned response."""
+    _session_post_patch.reset_mock(return_value=True, side_effect=True)
+    marker = request.node.get_closest_marker("canned")
+    if marker is not None:
+        _session_post_patch.return_value = canned_responses[marker.args[0]]
+    return _session_post_patch
+
+
+class TestFormatSymbol:
+    """Test Coinbase symbol normalization."""
+    
+    def test_uppercases_symbol(self) -> None:
+        """Test lower and mixed case symbols are uppercased."""
+        assert format_symbol_for_coinbase("btc-usd") == "BTC-USD"
+        assert format_symbol_for_coinbase("Eth-Eur") == "ETH-EUR"
+    
+    def test_uppercase_symbol_returned_unchanged(self) -> None:
+        """Test an already uppercase symbol is returned as the same object."""
+        symbol = "BTC-USD"
+        assert format_symbol_for_coinbase(symbol) is symbol
+
+
+class TestFormatQuantity:
+    """Test the _format_quantity helper."""
+    
+    def test_strips_trailing_zeros(self) -> None:
+        """Test fractional trailing zeros are removed."""
+        assert _format_quantity(0.002, 8) == "0.002"
+        assert _format_quantity(50000.0, 2) == "50000"
+    
+    def test_small_values_use_fixed_point(self) -> None:
+        """Test small quantities are never rendered in scientific notation."""
+        assert _format_quantity(0.00001234, 8) == "0.00001234"
+    
+    def test_zero_decimals_keeps_integer_zeros(self) -> None:
+        """Test integer precision does not strip significant zeros."""
+        assert _format_quantity(50000.0, 0) == "50000"
+        assert _format_quantity(100.4, 0) == "100"
+
+
+class TestGetProductPrecision:
+    """Test product precision lookup and caching."""
+    
+    @pytest.fixture
+    def mock_session_get(self) -> Any:
+        """Mock GET requests with a BTC-USD product response and an empty precision cache."""
+        mock_response = MagicMock()
+        mock_response.content = orjson.dumps({"base_increment": "0.00000001", "quote_increment": "0.01"})
+        with patch('requests.Session.get', return_value=mock_response) as mock_get, \
+                patch.dict('exchanges.coinbase._precision_cache', clear=True):
+            yield mock_get
+    
+    def test_decimals_from_increments(self, mock_session_get: Mock, mock_authenticator: Mock) -> None:
+        """Test decimal places are derived from the product increments."""
+        assert _get_product_precision("BTC-USD", "https://api.coinbase.com") == (8, 2)
+    
+    def test_decimals_from_increment(self) -> None:
+        """Test decimal places are counted from increment strings."""
+        assert _decimals_from_increment("0.00000001") == 8
+        assert _decimals_from_increment("0.01") == 2
+        assert _decimals_from_increment("0.010") == 2
+        assert _decimals_from_increment("1") == 0
+    
+    def test_precision_is_cached(self, mock_session_get: Mock, mock_authenticator: Mock) -> None:
+        """Test repeat lookups for a product skip the API call."""
+        _get_product_precision("BTC-USD", "https://api.coinbase.com")
+        _get_product_precision("BTC-USD", "https://api.coinbase.com")
+        
+        assert mock_session_get.call_count == 1
+    
+    def test_precision_cache_expires(self, mock_session_get: Mock, mock_authenticator: Mock) -> None:
+        """Test precision is fetched again once the cached entry is older than the TTL."""
+        from exchanges.coinbase import _PRECISION_TTL_SECONDS
+        
+        with patch('exchanges.coinbase.time.monotonic', return_value=0.0):
+            _get_product_precision("BTC-USD", "https://api.coinbase.com")
+        with patch('exchanges.coinbase.time.monotonic', return_value=_PRECISION_TTL_SECONDS + 1):
+            _get_product_precision("BTC-USD", "https://api.coinbase.com")
+        
+        assert mock_session_get.call_count == 2
+
+
+class TestGetSession:
+    """Test the shared HTTP session."""
+    
+    def test_session_is_reused(self) -> None:
+        """Test the same pooled session is returned on every call."""
+        from exchanges.coinbase import _get_session
+        
+        assert _get_session() is _get_session()
+
+
 @pytest.fixture
 def mock_product_precision() -> Any:
     """Mock the _get_product_precision function to avoid API calls."""
@@ -236,14 +316,21 @@ def mock_product_precision() -> Any:
         yield mock_precision
 
 
+@pytest.fixture(scope="module")
+def _authenticator_patch() -> Any:
+    """Patch the authenticator singleton once for the module; mock_authenticator resets it per test."""
+    with patch('exchanges.coinbase.get_coinbase_authenticator') as mock_get_auth:
+        mock_get_auth.return_value = Mock()
+        yield mock_get_auth
+
+
 @pytest.fixture
-def mock_authenticator() -> Any:
+def mock_authenticator(_authenticator_patch: Mock) -> Any:
     """Mock the authenticator singleton."""
-    with patch('exchanges.coinbase.get_coinbase_authenticator') as mock_get_auth:
-        mock_auth = Mock()
-        mock_auth.get_auth_headers.return_value = {
-            "Authorization": "Bearer test-token",
-            "Content-Type": "application/json"
-        }
-        mock_get_auth.return_value = mock_auth
-        yield mock_auth
+    mock_auth = _authenticator_patch.return_value
+    mock_auth.reset_mock(return_value=True, side_effect=True)
+    mock_auth.get_auth_headers.return_value = {
+        "Authorization": "Bearer test-token",
+        "Content-Type": "application/json"
+    }
+    return mock_auth
@@ -0,0 +1,207 @@
+"""
+Tests for the HTTP handlers in function_app.
+"""
+import logging
+import orjson
+import pytest
+from typing import Any, Dict, Optional
+from unittest.mock import patch
+
+import azure.functions as func
+
+import function_app
+from rate_limiter import RateLimiter
+from validate import ValidationConfig, configure, get_config
+
+
+@pytest.fixture
+def no_password() -> Any:
+    """Disable the webhook password check."""
+    with patch('function_app.check_password', return_value=(True, None)):
+        yield
+
+
+def _webhook_request(body: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> func.HttpRequest:
+    """Build a JSON webhook request from a whitelisted TradingView IP."""
+    return func.HttpRequest(
+        method="POST",
+        url="/api/arbWebhook",
+        headers={"Content-Type": "application/json", "X-Forwarded-For": "52.89.214.238", **(headers or {})},
+        body=orjson.dumps(body)
+    )
+
+
+@pytest.fixture
+def validation_config() -> Any:
+    """Return a function that applies security settings via configure(), restoring the previous ones afterwards."""
+    previous = get_config()
+    
+    def apply(cert_check: bool = False, dry_run: bool = True) -> None:
+        configure(ValidationConfig(ip_whitelist=True, cert_check=cert_check, dry_run=dry_run))
+    
+    yield apply
+    configure(previous)
+
+
+TRADINGVIEW_CERT_HEADER = "C=US, ST=Ohio, L=Westerville, O=TradingView, Inc., CN=webhook-server@tradingview.com"
+
+VALID_PAYLOAD = {"symbol": "BTC-USD", "action": "buy", "quantity_type": "cash", "quantity": 100, "close": 50000.0}
+
+
+class TestArbWebhook:
+    """Test arbWebhook responses."""
+    
+    @pytest.fixture(autouse=True)
+    def isolate_handler(self) -> Any:
+        """Keep Telegram notifications and rate limiting out of handler tests."""
+        with patch('function_app.queue_telegram_message'), \
+                patch.object(function_app._rate_limiter, 'check', return_value=True):
+            yield
+    
+    def test_dry_run_echoes_payload(self, no_password: None, validation_config: Any) -> None:
+        """Test dry-run responses echo the validated payload fields."""
+        validation_config(dry_run=True)
+        resp = function_app.arbWebhook(_webhook_request({**VALID_PAYLOAD, "extra": "ignored"}))
+        
+        assert resp.status_code == 200
+        assert orjson.loads(resp.get_body()) == {
+            "status": "success",
+            "message": "Webhook received and validated (DRY RUN - no order placed)",
+            "dry_run": True,
+            "data": VALID_PAYLOAD
+        }
+    
+    def test_order_placed_response(self, no_password: None, validation_config: Any) -> None:
+        """Test a placed order returns its ID and the validated payload fields."""
+        validation_config(dry_run=False)
+        order_result = {"success": True, "success_response": {"order_id": "order-1", "product_id": "BTC-USD", "side": "BUY"}}
+        with patch('exchanges.place_order', return_value=order_result):
+            resp = function_app.arbWebhook(_webhook_request(VALID_PAYLOAD))
+        
+        assert resp.status_code == 200
+        assert orjson.loads(resp.get_body()) == {
+            "status": "success",
+            "message": "Order placed successfully",
+            "order_id": "order-1",
+            "data": VALID_PAYLOAD
+        }
+        assert function_app._ORDER_PLACED_RESPONSE == {"status": "success", "message": "Order placed successfully"}
+    
+    def test_order_audit_logged_as_one_record(self, no_password: None, validation_config: Any,
+                                              caplog: pytest.LogCaptureFixture) -> None:
+        """Test a placed order is logged as a single multi-line audit record."""
+        validation_config(dry_run=False)
+        order_result = {"success": True, "success_response": {"order_id": "order-1", "product_id": "BTC-USD", "side": "BUY"}}
+        with patch('function_app.setup_logging'), \
+                patch('exchanges.place_order', return_value=order_result), \
+                caplog.at_level(logging.INFO):
+            function_app.arbWebhook(_webhook_request(VALID_PAYLOAD))
+        
+        audit = [record.getMessage() for record in caplog.records if "ORDER PLACED SUCCESSFULLY" in record.getMessage()]
+        assert len(audit) == 1
+        assert "Order ID: order-1\nProduct: BTC-USD\nSide: BUY\n" in audit[0]
+    
+    def test_cert_subject_ignored_when_cert_check_disabled(self, no_password: None, validation_config: Any) -> None:
+        """Test the client certificate header is not parsed unless the cert check is enabled."""
+        validation_config(cert_check=False, dry_run=True)
+        req = _webhook_request(VALID_PAYLOAD, {"X-ARR-ClientCert-Subject": "CN=someone"})
+        with patch('function_app.parse_cert_subject') as mock_parse:
+            resp = function_app.arbWebhook(req)
+        
+        assert resp.status_code == 200
+        mock_parse.assert_not_called()
+    
+    @pytest.mark.parametrize("cert_subject,expected_status", [
+        (TRADINGVIEW_CERT_HEADER, 200),
+        ("CN=someone", 403),
+    ], ids=["tradingview", "wrong-cert"])
+    def test_cert_check_enabled_by_configure(self, no_password: None, validation_config: Any,
+                                             cert_subject: str, expected_status: int) -> None:
+        """Test enabling the cert check via configure() parses the header and enforces the subject."""
+        validation_config(cert_check=True, dry_run=True)
+        req = _webhook_request(VALID_PAYLOAD, {"X-ARR-ClientCert-Subject": cert_subject})
+        
+        resp = function_app.arbWebhook(req)
+        
+        assert resp.status_code == expected_status
+
+
+class TestArbWebhookRateLimit:
+    """Test arbWebhook rate limiting with a real limiter."""
+    
+    def test_excess_requests_rejected(self, no_password: None, validation_config: Any) -> None:
+        """Test requests over the limit get a 429 before any further processing."""
+        validation_config(dry_run=True)
+        with patch('function_app.queue_telegram_message'), \
+                patch('function_app._rate_limiter', RateLimiter(1, 60)):
+            first = function_app.arbWebhook(_webhook_request(VALID_PAYLOAD))
+            second = function_app.arbWebhook(_webhook_request(VALID_PAYLOAD))
+        
+        assert first.status_code == 200
+        assert second.status_code == 429
+        assert second.get_body() == function_app._RATE_LIMITED_BODY
+
+
+class TestWebhookVerifyConnectivity:
+    """Test the connectivity verification endpoint."""
+    
+    @pytest.fixture(autouse=True)
+    def clear_verify_cache(self) -> Any:
+        """Start each test without a cached connectivity result."""
+        with patch('function_app._verify_cache', None):
+            yield
+    
+    def _request(self) -> func.HttpRequest:
+        return func.HttpRequest(method="GET", url="/api/webhookVerifyConnectivity", body=b"")
+    
+    def test_success(self, no_password: None) -> None:
+        """Test balances are returned as JSON on success."""
+        with patch('exchanges.verify_coinbase_connection', return_value={"USD": "10.00 USD"}):
+            resp = function_app.webhookVerifyConnectivity(self._request())
+        
+        assert resp.status_code == 200
+        assert orjson.loads(resp.get_body())["result"] == {"USD": "10.00 USD"}
+    
+    def test_failure_returns_error_json(self, no_password: None) -> None:
+        """Test a failed verification returns a JSON 500 error."""
+        with patch('exchanges.verify_coinbase_connection', side_effect=ValueError("bad credentials")):
+            resp = function_app.webhookVerifyConnectivity(self._request())
+        
+        assert resp.status_code == 500
+        assert orjson.loads(resp.get_body()) == {
+            "status": "error",
+            "message": "Failed to verify Coinbase connectivity: bad credentials"
+        }
+    
+    def test_success_cached_within_ttl(self, no_password: None) -> None:
+        """Test a successful result is reused until the cache TTL passes."""
+        with patch('exchanges.verify_coinbase_connection', side_effect=[{"USD": "10.00 USD"}, {"USD": "20.00 USD"}]) as mock_verify, \
+                patch('function_app.time.monotonic', side_effect=[100.0, 110.0, 131.0]):
+            first = function_app.webhookVerifyConnectivity(self._request())
+            cached = function_app.webhookVerifyConnectivity(self._request())
+            refreshed = function_app.webhookVerifyConnectivity(self._request())
+        
+        assert mock_verify.call_count == 2
+        assert orjson.loads(first.get_body())["result"] == {"USD": "10.00 USD"}
+        assert orjson.loads(cached.get_body())["result"] == {"USD": "10.00 USD"}
+        assert orjson.loads(refreshed.get_body())["result"] == {"USD": "20.00 USD"}
+    
+    def test_failure_not_cached(self, no_password: None) -> None:
+        """Test a failed verification is retried on the next request."""
+        with patch('exchanges.verify_coinbase_connection', side_effect=[ValueError("timeout"), {"USD": "10.00 USD"}]):
+            failed = function_app.webhookVerifyConnectivity(self._request())
+            recovered = function_app.webhookVerifyConnectivity(self._request())
+        
+        assert failed.status_code == 500
+        assert recovered.status_code == 200
+    
+    def test_lock_not_held_during_coinbase_call(self, no_password: None) -> None:
+        """Test a slow Coinbase call does not block other probes on the cache lock."""
+        def verify() -> Dict[str, str]:
+            assert not function_app._verify_lock.locked()
+            return {"USD": "10.00 USD"}
+        
+        with patch('exchanges.verify_coinbase_connection', side_effect=verify):
+            resp = function_app.webhookVerifyConnectivity(self._request())
+        
+        assert resp.status_code == 200
@@ -0,0 +1,75 @@
+"""
+Unit tests for Telegram notifications.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+from unittest.mock import Mock, patch
+
+import pytest
+
+import notifications
+from notifications import queue_telegram_message, send_telegram_message, MAX_TELEGRAM_MESSAGE
+
+
+@pytest.fixture
+def telegram_configured() -> Any:
+    """Configure Telegram credentials and mock POSTs made through the shared session."""
+    with patch('notifications.TELEGRAM_TOKEN', "token"), \
+            patch('notifications.TELEGRAM_CHAT_ID', "chat"), \
+            patch('requests.Session.post', return_value=Mock(status_code=200)) as mock_post:
+        yield mock_post
+
+
+class TestSendTelegramMessage:
+    """Test send_telegram_message."""
+    
+    def test_skipped_when_not_configured(self) -> None:
+        """Test no request is made without a token and chat ID."""
+        with patch('notifications.TELEGRAM_TOKEN', None), \
+                patch('requests.Session.post') as mock_post:
+            send_telegram_message("hello")
+            
+            mock_post.assert_not_called()
+    
+    def test_sends_message(self, telegram_configured: Mock) -> None:
+        """Test the message is posted to the chat."""
+        send_telegram_message("hello")
+        
+        telegram_configured.assert_called_once()
+        assert telegram_configured.call_args[1]["json"] == {"chat_id": "chat", "text": "hello"}
+    
+    def test_long_message_truncated(self, telegram_configured: Mock) -> None:
+        """Test messages over Telegram's limit are truncated."""
+        send_telegram_message("x" * (MAX_TELEGRAM_MESSAGE + 10))
+        
+        text = telegram_configured.call_args[1]["json"]["text"]
+        assert len(text) == MAX_TELEGRAM_MESSAGE
+        assert text.endswith("...")
+    
+    def test_errors_are_not_raised(self, telegram_configured: Mock) -> None:
+        """Test request failures are logged, not raised."""
+        telegram_configured.side_effect = ConnectionError("down")
+        
+        send_telegram_message("hello")
+    
+    def test_session_is_reused(self) -> None:
+        """Test the same pooled session is returned on every call."""
+        assert notifications._get_session() is notifications._get_session()
+    
+    def test_concurrent_first_calls_share_one_session(self) -> None:
+        """Test threads racing to create the session all get the same one."""
+        with patch('notifications._session', None), \
+                ThreadPoolExecutor(max_workers=8) as pool:
+            sessions = list(pool.map(lambda _: notifications._get_session(), range(8)))
+        
+        assert all(session is sessions[0] for session in sessions)
+
+
+class TestQueueTelegramMessage:
+    """Test background Telegram sends."""
+    
+    def test_message_sent_in_background(self, telegram_configured: Mock) -> None:
+        """Test queued messages are sent on a worker thread."""
+        queue_telegram_message("hello").result(timeout=5)
+        
+        assert telegram_configured.call_args[1]["json"]["text"] == "hello"
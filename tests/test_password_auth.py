@@ -2,102 +2,72 @@
 Tests for password authentication.
 """
 import pytest
-import os
-from unittest.mock import Mock, patch
-from function_app import check_password
+from typing import Any, Dict, Optional
+from unittest.mock import Mock
+
+import azure.functions as func
+import orjson
+
+import function_app
+from function_app import _make_password_checker
+
+
+def _request(headers: Optional[Dict[str, str]] = None, params: Optional[Dict[str, str]] = None) -> Mock:
+    """Build a mock request with plain dict headers and query parameters."""
+    req = Mock()
+    req.headers = headers or {}
+    req.params = params or {}
+    return req
 
 
 class TestPasswordAuthentication:
     """Test the password authentication functionality."""
     
-    def test_no_password_configured_allows_all(self) -> None:
-        """Test that when no password is configured, all requests are allowed."""
-        with patch.dict(os.environ, {"WEBHOOK_PASSWORD": ""}):
-            # Reload the module to pick up the environment variable
-            from importlib import reload
-            import function_app
-            reload(function_app)
-            
-            # Create mock request
-            req = Mock()
-            req.headers = {}
-            req.params = {}
-            
-            valid, error = function_app.check_password(req)
-            assert valid is True
-            assert error is None
+    @pytest.mark.parametrize("configured,headers,params,body,expected_valid", [
+        # No password configured: every request is allowed
+        ("", {}, {}, None, True),
+        ("test-secret-123", {'Authorization': 'Bearer test-secret-123'}, {}, None, True),
+        ("my-password", {'X-Webhook-Password': 'my-password'}, {}, None, True),
+        ("query-pwd", {}, {'password': 'query-pwd'}, None, True),
+        ("body-pwd", {}, {}, {"password": "body-pwd"}, True),
+        ("correct-password", {'Authorization': 'Bearer wrong-password'}, {}, None, False),
+        ("correct-password", {'Authorization': 'correct-password'}, {}, None, False),  # Missing 'Bearer '
+        ("required-password", {}, {}, None, False),
+        ("body-pwd", {}, {}, {"password": 12345}, False),  # Non-string body password
+    ], ids=[
+        "no-password", "bearer", "custom-header", "query-param", "body",
+        "wrong-password", "no-bearer-prefix", "missing-password", "non-string-body",
+    ])
+    def test_password_sources(self, configured: str, headers: Dict[str, str], params: Dict[str, str],
+                              body: Optional[Any], expected_valid: bool) -> None:
+        """Test each password source is accepted and wrong or missing passwords are rejected."""
+        check_password = _make_password_checker(configured)
+        
+        valid, error = check_password(_request(headers, params), body)
+        
+        assert valid is expected_valid
+        assert error == (None if expected_valid else "Unauthorized: Invalid or missing password")
     
-    def test_password_in_authorization_header(self) -> None:
-        """Test password check with Bearer token in Authorization header."""
-        with patch.dict(os.environ, {"WEBHOOK_PASSWORD": "test-secret-123"}):
-            from importlib import reload
-            import function_app
-            reload(function_app)
-            
-            req = Mock()
-            req.headers = {'Authorization': 'Bearer test-secret-123'}
-            req.params = {}
-            
-            valid, error = function_app.check_password(req)
+    def test_password_in_real_request_headers(self) -> None:
+        """Test header passwords are found on an Azure request (case-insensitive header mapping)."""
+        check_password = _make_password_checker("header-pwd")
+        
+        for headers in ({'Authorization': 'Bearer header-pwd'}, {'x-webhook-password': 'header-pwd'}):
+            req = func.HttpRequest(method="POST", url="/api/arbWebhook", headers=headers, body=b"")
+            valid, error = check_password(req)
             assert valid is True
             assert error is None
     
-    def test_password_in_custom_header(self) -> None:
-        """Test password check with custom X-Webhook-Password header."""
-        with patch.dict(os.environ, {"WEBHOOK_PASSWORD": "my-password"}):
-            from importlib import reload
-            import function_app
-            reload(function_app)
-            
-            req = Mock()
-            req.headers = {'X-Webhook-Password': 'my-password'}
-            req.params = {}
-            
-            valid, error = function_app.check_password(req)
-            assert valid is True
-            assert error is None
-    
-    def test_password_in_query_param(self) -> None:
-        """Test password check with query parameter."""
-        with patch.dict(os.environ, {"WEBHOOK_PASSWORD": "query-pwd"}):
-            from importlib import reload
-            import function_app
-            reload(function_app)
-            
-            req = Mock()
-            req.headers = {}
-            req.params = {'password': 'query-pwd'}
-            
-            valid, error = function_app.check_password(req)
-            assert valid is True
-            assert error is None
-    
-    def test_wrong_password_rejected(self) -> None:
-        """Test that wrong password is rejected."""
-        with patch.dict(os.environ, {"WEBHOOK_PASSWORD": "correct-password"}):
-            from importlib import reload
-            import function_app
-            reload(function_app)
-            
-            req = Mock()
-            req.headers = {'Authorization': 'Bearer wrong-password'}
-            req.params = {}
-            
-            valid, error = function_app.check_password(req)
-            assert valid is False
-            assert error == "Unauthorized: Invalid or missing password"
-    
-    def test_missing_password_rejected(self) -> None:
-        """Test that missing password is rejected when password is required."""
-        with patch.dict(os.environ, {"WEBHOOK_PASSWORD": "required-password"}):
-            from importlib import reload
-            import function_app
-            reload(function_app)
-            
-            req = Mock()
-            req.headers = {}
-            req.params = {}
-            
-            valid, error = function_app.check_password(req)
-            assert valid is False
-            assert error == "Unauthorized: Invalid or missing password"
+    def test_webhook_rejects_wrong_password(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test the webhook returns a JSON 401 error before any other processing."""
+        monkeypatch.setattr(function_app, "check_password", _make_password_checker("correct-password"))
+        req = func.HttpRequest(
+            method="POST",
+            url="/api/arbWebhook",
+            headers={"Content-Type": "application/json"},
+            body=b'{"password": "wrong-password"}'
+        )
+        
+        resp = function_app.arbWebhook(req)
+        assert resp.status_code == 401
+        assert orjson.loads(resp.get_body()) == {"error": "Unauthorized: Invalid or missing password"}
@@ -0,0 +1,62 @@
+"""
+Unit tests for the webhook rate limiter.
+"""
+from unittest.mock import patch
+
+from rate_limiter import RateLimiter, _MAX_TRACKED_CALLERS
+
+
+class TestRateLimiter:
+    """Test the sliding-window RateLimiter."""
+    
+    def test_allows_calls_within_limit(self) -> None:
+        """Test calls up to max_calls are allowed."""
+        limiter = RateLimiter(max_calls=3, window_s=60)
+        
+        assert all(limiter.check("1.2.3.4") for _ in range(3))
+    
+    def test_rejects_calls_over_limit(self) -> None:
+        """Test the call after max_calls is rejected."""
+        limiter = RateLimiter(max_calls=2, window_s=60)
+        
+        limiter.check("1.2.3.4")
+        limiter.check("1.2.3.4")
+        
+        assert limiter.check("1.2.3.4") is False
+    
+    def test_limits_are_per_caller(self) -> None:
+        """Test one caller's usage does not affect another."""
+        limiter = RateLimiter(max_calls=1, window_s=60)
+        
+        assert limiter.check("1.2.3.4") is True
+        assert limiter.check("5.6.7.8") is True
+        assert limiter.check("1.2.3.4") is False
+    
+    def test_window_expiry(self) -> None:
+        """Test calls are allowed again once the window has passed."""
+        limiter = RateLimiter(max_calls=1, window_s=60)
+        
+        with patch('rate_limiter.time.monotonic', side_effect=[100.0, 130.0, 161.0]):
+            assert limiter.check("1.2.3.4") is True
+            assert limiter.check("1.2.3.4") is False
+            assert limiter.check("1.2.3.4") is True
+    
+    def test_zero_max_calls_disables_limiting(self) -> None:
+        """Test max_calls=0 allows every call."""
+        limiter = RateLimiter(max_calls=0, window_s=60)
+        
+        assert all(limiter.check("1.2.3.4") for _ in range(100))
+    
+    def test_tracked_callers_are_capped(self) -> None:
+        """Test the least recently seen caller is evicted once the table is full."""
+        limiter = RateLimiter(max_calls=1, window_s=60)
+        limiter.check("first")
+        limiter.check("second")
+        limiter.check("first")  # Rejected, but marks "first" as recently seen
+        
+        for i in range(_MAX_TRACKED_CALLERS - 1):
+            limiter.check(f"spoofed-{i}")
+        
+        assert len(limiter._calls) == _MAX_TRACKED_CALLERS
+        assert "second" not in limiter._calls
+        assert limiter.check("first") is False
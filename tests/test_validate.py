@@ -1,28 +1,51 @@
 """
 Unit tests for webhook validation module.
 """
-from unittest.mock import patch
-from typing import Dict, Any
+import pytest
+import time
+from typing import Any, Dict, FrozenSet, Iterator, Optional, Tuple
 
 from validate import (
+    ValidationConfig,
+    _ip_allowed,
     check_headers,
+    configure,
+    get_config,
+    parse_cert_subject,
     validate_payload,
 )
 
 
+# (ENABLE_IP_WHITELIST, ENABLE_CERT_CHECK, TRADINGVIEW_ALLOWED_IPS or None to keep the default)
+NO_CHECKS = (False, False, None)
+IP_WHITELIST_ONLY = (True, False, frozenset({"52.89.214.238"}))
+CERT_CHECK_ONLY = (False, True, None)
+
+
+@pytest.fixture
+def validate_flags(request: pytest.FixtureRequest, monkeypatch: pytest.MonkeyPatch) -> Iterator[Tuple[bool, bool, Optional[FrozenSet[str]]]]:
+    """Set the validate module's security flags from an indirect parametrize tuple."""
+    ip_whitelist, cert_check, allowed_ips = request.param
+    previous = get_config()
+    configure(ValidationConfig(ip_whitelist=ip_whitelist, cert_check=cert_check, dry_run=previous.dry_run))
+    if allowed_ips is not None:
+        monkeypatch.setattr('validate.TRADINGVIEW_ALLOWED_IPS', allowed_ips)
+    yield request.param
+    configure(previous)
+
+
 class TestCheckHeaders:
     """Test header validation function."""
     
-    def test_valid_headers(self):
+    @pytest.mark.parametrize("validate_flags", [NO_CHECKS], indirect=True)
+    def test_valid_headers(self, validate_flags: Any):
         """Test validation passes with correct headers."""
         headers = {"content-type": "application/json"}
         
-        with patch('validate.ENABLE_IP_WHITELIST', False):
-            with patch('validate.ENABLE_CERT_CHECK', False):
-                valid, error = check_headers(headers)
-                
-                assert valid is True
-                assert error is None
+        valid, error = check_headers(headers)
+        
+        assert valid is True
+        assert error is None
     
     def test_missing_content_type(self):
         """Test validation fails without content-type."""
@@ -44,56 +67,58 @@ class TestCheckHeaders:
         assert error is not None
         assert "Content-Type" in error
     
-    def test_content_type_case_insensitive(self) -> None:
+    def test_content_type_other_json_media_type_rejected(self) -> None:
+        """Test only the application/json media type is accepted, not types containing it."""
+        for content_type in ("application/json-patch+json", "text/plain; application/json"):
+            valid, error = check_headers({"content-type": content_type})
+            
+            assert valid is False
+            assert error == "Content-Type must be application/json"
+    
+    @pytest.mark.parametrize("validate_flags", [NO_CHECKS], indirect=True)
+    def test_content_type_case_insensitive(self, validate_flags: Any) -> None:
         """Test content-type check is case insensitive."""
         headers = {"content-type": "APPLICATION/JSON; charset=utf-8"}
         
-        with patch('validate.ENABLE_IP_WHITELIST', False):
-            with patch('validate.ENABLE_CERT_CHECK', False):
-                valid, error = check_headers(headers)
-                
-                assert valid is True
-                assert error is None
+        valid, error = check_headers(headers)
+        
+        assert valid is True
+        assert error is None
     
-    def test_ip_whitelist_enabled_valid_ip(self):
+    @pytest.mark.parametrize("validate_flags", [IP_WHITELIST_ONLY], indirect=True)
+    def test_ip_whitelist_enabled_valid_ip(self, validate_flags: Any):
         """Test IP whitelist allows whitelisted IP."""
         headers = {"content-type": "application/json"}
         
-        with patch('validate.ENABLE_IP_WHITELIST', True):
-            with patch('validate.ENABLE_CERT_CHECK', False):
-                with patch('validate.TRADINGVIEW_ALLOWED_IPS', {"52.89.214.238"}):
-                    valid, error = check_headers(headers, client_ip="52.89.214.238")
-                    
-                    assert valid is True
-                    assert error is None
+        valid, error = check_headers(headers, client_ip="52.89.214.238")
+        
+        assert valid is True
+        assert error is None
     
-    def test_ip_whitelist_enabled_invalid_ip(self):
+    @pytest.mark.parametrize("validate_flags", [IP_WHITELIST_ONLY], indirect=True)
+    def test_ip_whitelist_enabled_invalid_ip(self, validate_flags: Any):
         """Test IP whitelist rejects non-whitelisted IP."""
         headers = {"content-type": "application/json"}
         
-        with patch('validate.ENABLE_IP_WHITELIST', True):
-            with patch('validate.ENABLE_CERT_CHECK', False):
-                with patch('validate.TRADINGVIEW_ALLOWED_IPS', {"52.89.214.238"}):
-                    valid, error = check_headers(headers, client_ip="1.2.3.4")
-                    
-                    assert valid is False
-                    assert error is not None
-                    assert "Unauthorized IP address" in error
+        valid, error = check_headers(headers, client_ip="1.2.3.4")
+        
+        assert valid is False
+        assert error is not None
+        assert "Unauthorized IP address" in error
     
-    def test_ip_whitelist_enabled_no_ip(self):
+    @pytest.mark.parametrize("validate_flags", [IP_WHITELIST_ONLY], indirect=True)
+    def test_ip_whitelist_enabled_no_ip(self, validate_flags: Any):
         """Test IP whitelist fails when no IP provided."""
         headers = {"content-type": "application/json"}
         
-        with patch('validate.ENABLE_IP_WHITELIST', True):
-            with patch('validate.ENABLE_CERT_CHECK', False):
-                with patch('validate.TRADINGVIEW_ALLOWED_IPS', {"52.89.214.238"}):
-                    valid, error = check_headers(headers, client_ip=None)
-                    
-                    assert valid is False
-                    assert error is not None
-                    assert "Unable to verify client IP" in error
+        valid, error = check_headers(headers, client_ip=None)
+        
+        assert valid is False
+        assert error is not None
+        assert "Unable to verify client IP" in error
     
-    def test_cert_check_enabled_valid_cert(self):
+    @pytest.mark.parametrize("validate_flags", [CERT_CHECK_ONLY], indirect=True)
+    def test_cert_check_enabled_valid_cert(self, validate_flags: Any):
         """Test certificate validation with valid cert."""
         headers = {"content-type": "application/json"}
         cert = {
@@ -104,14 +129,13 @@ class TestCheckHeaders:
             "CN": "webhook-server@tradingview.com"
         }
         
-        with patch('validate.ENABLE_IP_WHITELIST', False):
-            with patch('validate.ENABLE_CERT_CHECK', True):
-                valid, error = check_headers(headers, client_cert=cert)
-                
-                assert valid is True
-                assert error is None
+        valid, error = check_headers(headers, client_cert=cert)
+        
+        assert valid is True
+        assert error is None
     
-    def test_cert_check_enabled_invalid_cert(self):
+    @pytest.mark.parametrize("validate_flags", [CERT_CHECK_ONLY], indirect=True)
+    def test_cert_check_enabled_invalid_cert(self, validate_flags: Any):
         """Test certificate validation with invalid cert."""
         headers = {"content-type": "application/json"}
         cert = {
@@ -122,25 +146,115 @@ class TestCheckHeaders:
             "CN": "webhook-server@tradingview.com"
         }
         
-        with patch('validate.ENABLE_IP_WHITELIST', False):
-            with patch('validate.ENABLE_CERT_CHECK', True):
-                valid, error = check_headers(headers, client_cert=cert)
-                
-                assert valid is False
-                assert error is not None
-                assert "Invalid certificate" in error
+        valid, error = check_headers(headers, client_cert=cert)
+        
+        assert valid is False
+        assert error is not None
+        assert "Invalid certificate" in error
     
-    def test_cert_check_enabled_no_cert(self):
+    @pytest.mark.parametrize("validate_flags", [CERT_CHECK_ONLY], indirect=True)
+    def test_cert_check_missing_field(self, validate_flags: Any) -> None:
+        """Test a certificate lacking an expected field reports that field."""
+        headers = {"content-type": "application/json"}
+        cert = {"C": "US", "ST": "Ohio", "L": "Westerville", "O": "TradingView, Inc."}
+        
+        valid, error = check_headers(headers, client_cert=cert)
+        
+        assert valid is False
+        assert error == "Invalid certificate: CN mismatch"
+    
+    @pytest.mark.parametrize("validate_flags", [CERT_CHECK_ONLY], indirect=True)
+    def test_cert_check_enabled_no_cert(self, validate_flags: Any):
         """Test certificate validation fails when no cert provided."""
         headers = {"content-type": "application/json"}
         
-        with patch('validate.ENABLE_IP_WHITELIST', False):
-            with patch('validate.ENABLE_CERT_CHECK', True):
-                valid, error = check_headers(headers, client_cert=None)
-                
-                assert valid is False
-                assert error is not None
-                assert "Client certificate required" in error
+        valid, error = check_headers(headers, client_cert=None)
+        
+        assert valid is False
+        assert error is not None
+        assert "Client certificate required" in error
+
+
+class TestValidationConfig:
+    """Test loading security settings from the environment."""
+    
+    def test_from_env(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test flags are parsed case-insensitively and unset flags use their defaults."""
+        monkeypatch.setenv("ENABLE_IP_WHITELIST", "FALSE")
+        monkeypatch.setenv("ENABLE_CERT_CHECK", "True")
+        monkeypatch.delenv("DRY_RUN_MODE", raising=False)
+        
+        assert ValidationConfig.from_env() == ValidationConfig(ip_whitelist=False, cert_check=True, dry_run=True)
+
+
+class TestIpAllowed:
+    """Test IP whitelist matching against addresses and CIDR ranges."""
+    
+    ALLOWED = frozenset({"52.89.214.238", "10.0.0.0/24", "10.0.1.0/24", "2001:db8::/32"})
+    
+    def test_exact_address(self) -> None:
+        """Test a single whitelisted address matches only itself."""
+        assert _ip_allowed("52.89.214.238", self.ALLOWED) is True
+        assert _ip_allowed("52.89.214.239", self.ALLOWED) is False
+    
+    def test_cidr_range(self) -> None:
+        """Test addresses inside merged adjacent ranges match and neighbours outside do not."""
+        assert _ip_allowed("10.0.0.0", self.ALLOWED) is True
+        assert _ip_allowed("10.0.1.255", self.ALLOWED) is True
+        assert _ip_allowed("10.0.2.0", self.ALLOWED) is False
+        assert _ip_allowed("9.255.255.255", self.ALLOWED) is False
+    
+    def test_ipv6(self) -> None:
+        """Test IPv6 ranges and IPv4-mapped IPv6 addresses."""
+        assert _ip_allowed("2001:db8::1", self.ALLOWED) is True
+        assert _ip_allowed("2001:db9::1", self.ALLOWED) is False
+        assert _ip_allowed("::ffff:52.89.214.238", self.ALLOWED) is True
+    
+    def test_decision_cached(self) -> None:
+        """Test repeat checks for an address reuse the cached decision."""
+        _ip_allowed.cache_clear()
+        
+        assert _ip_allowed("10.0.0.7", self.ALLOWED) is True
+        assert _ip_allowed("10.0.0.7", self.ALLOWED) is True
+        
+        assert _ip_allowed.cache_info().hits == 1
+    
+    def test_invalid_address_rejected(self) -> None:
+        """Test malformed client addresses are rejected rather than raising."""
+        assert _ip_allowed("not-an-ip", self.ALLOWED) is False
+        assert _ip_allowed("52.89.214.238:443", self.ALLOWED) is False
+        assert _ip_allowed("", self.ALLOWED) is False
+
+
+class TestParseCertSubject:
+    """Test certificate subject parsing."""
+    
+    def test_tradingview_subject(self):
+        """Test the TradingView subject parses to the expected fields, including commas in values."""
+        from validate import TRADINGVIEW_CERT_SUBJECT
+        subject = "C=US, ST=Ohio, L=Westerville, O=TradingView, Inc., CN=webhook-server@tradingview.com"
+        
+        assert parse_cert_subject(subject) == TRADINGVIEW_CERT_SUBJECT
+    
+    def test_whitespace_around_separators(self):
+        """Test whitespace around '=' and ',' is ignored."""
+        assert parse_cert_subject(" C = US ,CN=host ") == {"C": "US", "CN": "host"}
+    
+    def test_no_fields(self):
+        """Test subjects without KEY=value pairs parse to an empty dict."""
+        assert parse_cert_subject("not a subject") == {}
+    
+    @pytest.mark.parametrize("subject,expected", [
+        ("CN=" + "a" * 100000, {"CN": "a" * 100000}),
+        ("a" * 100000, {}),
+        ("CN=x" + ", a" * 50000, {"CN": "x" + ", a" * 50000}),
+    ], ids=["long-value", "no-separator", "many-commas"])
+    def test_long_subject_parses_in_linear_time(self, subject: str, expected: Dict[str, str]):
+        """Test a long client-supplied subject parses quickly (no backtracking blow-up)."""
+        start = time.perf_counter()
+        
+        assert parse_cert_subject(subject) == expected
+        assert time.perf_counter() - start < 1.0
 
 
 class TestValidatePayload:
@@ -178,6 +292,13 @@ class TestValidatePayload:
         assert "Missing required fields" in error
         assert "close" in error
     
+    def test_missing_fields_listed_in_order(self) -> None:
+        """Test missing fields are reported in a stable, sorted order."""
+        valid, error = validate_payload({"symbol": "BTCUSD", "action": "buy"})
+        
+        assert valid is False
+        assert error == "Missing required fields: close, quantity, quantity_type"
+    
     def test_empty_symbol(self):
         """Test validation fails with empty symbol."""
         payload = {
@@ -210,6 +331,22 @@ class TestValidatePayload:
         assert error is not None
         assert "action" in error.lower()
     
+    def test_unhashable_action(self) -> None:
+        """Test a non-string action is rejected rather than raising."""
+        payload = {
+            "symbol": "BTCUSD",
+            "action": ["buy"],
+            "quantity_type": "cash",
+            "quantity": "100",
+            "close": "50000.00"
+        }
+        
+        valid, error = validate_payload(payload)
+        
+        assert valid is False
+        assert error is not None
+        assert "action" in error.lower()
+    
     def test_valid_actions(self):
         """Test validation passes for both buy and sell."""
         for action in ["buy", "sell"]:
@@ -332,3 +469,18 @@ class TestValidatePayload:
         valid, _ = validate_payload(payload)
         
         assert valid is True
+    
+    def test_boolean_quantity_rejected(self) -> None:
+        """Test a JSON boolean is not accepted as a quantity."""
+        payload: Dict[str, Any] = {
+            "symbol": "BTCUSD",
+            "action": "buy",
+            "quantity_type": "cash",
+            "quantity": True,
+            "close": 50000.00
+        }
+        
+        valid, error = validate_payload(payload)
+        
+        assert valid is False
+        assert error == "Field 'quantity' must be a valid number"
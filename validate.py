@@ -1,20 +1,56 @@
-from typing import Any, Dict, Optional, Set
+from bisect import bisect_right
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, FrozenSet, List, Mapping, Optional, Tuple
+import functools
+import ipaddress
 import logging
+import operator
 import os
+import re
+import socket
 
-# Environment variables for security checks
-ENABLE_IP_WHITELIST = os.getenv("ENABLE_IP_WHITELIST", "true").lower() == "true"
-ENABLE_CERT_CHECK = os.getenv("ENABLE_CERT_CHECK", "false").lower() == "true"
-DRY_RUN_MODE = os.getenv("DRY_RUN_MODE", "true").lower() == "true"
+
+@dataclass(frozen=True, slots=True)
+class ValidationConfig:
+    """Security check settings, read from the environment once at import."""
+    
+    ip_whitelist: bool
+    cert_check: bool
+    dry_run: bool
+    
+    @classmethod
+    def from_env(cls) -> "ValidationConfig":
+        """
+        Load settings from environment variables.
+        
+        Environment variables:
+            ENABLE_IP_WHITELIST: Enforce TRADINGVIEW_ALLOWED_IPS. Default: true
+            ENABLE_CERT_CHECK: Require TradingView's client certificate. Default: false
+            DRY_RUN_MODE: Validate webhooks without placing orders. Default: true
+            
+        Returns:
+            ValidationConfig instance
+        """
+        return cls(
+            ip_whitelist=os.getenv("ENABLE_IP_WHITELIST", "true").lower() == "true",
+            cert_check=os.getenv("ENABLE_CERT_CHECK", "false").lower() == "true",
+            dry_run=os.getenv("DRY_RUN_MODE", "true").lower() == "true",
+        )
+
+
+# Active settings: read them with get_config() and replace them with configure() (which also
+# selects the checks), so check_headers and function_app always see the same values
+_CONFIG = ValidationConfig.from_env()
 
 # TradingView webhook IPs (you should update this with actual IPs)
 # TradingView doesn't publish official webhook IPs, so you may need to whitelist specific IPs
-TRADINGVIEW_ALLOWED_IPS: Set[str] = set([
+# Entries may be single addresses or CIDR ranges (e.g. "52.89.214.0/24"), IPv4 or IPv6
+TRADINGVIEW_ALLOWED_IPS: FrozenSet[str] = frozenset({
     "52.89.214.238",
     "34.212.75.30",
     "54.218.53.128",
     "52.32.178.7",
-])
+})
 
 # TradingView certificate subject fields for webhook verification
 TRADINGVIEW_CERT_SUBJECT = {
@@ -25,59 +61,271 @@ TRADINGVIEW_CERT_SUBJECT = {
     "CN": "webhook-server@tradingview.com"
 }
 
+# IPv4 addresses are matched in the IPv6 address space as IPv4-mapped addresses (::ffff:a.b.c.d)
+_IPV4_MAPPED = 0xFFFF << 32
+
+# (field, expected value) pairs checked in order against the client certificate
+_EXPECTED_CERT: Tuple[Tuple[str, str], ...] = tuple(TRADINGVIEW_CERT_SUBJECT.items())
+# A valid certificate is matched with one itemgetter call and one tuple comparison
+_get_cert_fields = operator.itemgetter(*TRADINGVIEW_CERT_SUBJECT)
+_EXPECTED_CERT_VALUES: Tuple[str, ...] = tuple(TRADINGVIEW_CERT_SUBJECT.values())
+
+# Separator between "KEY=value" pairs of a certificate subject: only a comma followed by a key, since
+# values may contain commas (e.g. "O=TradingView, Inc."); a split keeps parsing linear in the header length
+_CERT_RDN_SPLIT_RE = re.compile(r',\s*(?=[A-Za-z0-9.]+\s*=)')
+
 # Required fields in the webhook payload
-REQUIRED_FIELDS: Set[str] = {"symbol", "action", "quantity_type", "quantity", "close"}
+REQUIRED_FIELDS: FrozenSet[str] = frozenset({"symbol", "action", "quantity_type", "quantity", "close"})
+
+# Allowed values for the enumerated payload fields
+VALID_ACTIONS: FrozenSet[str] = frozenset({"buy", "sell"})
+VALID_QUANTITY_TYPES: FrozenSet[str] = frozenset({"cash", "contracts", "percent"})
+
+
+def parse_cert_subject(cert_subject: str) -> Dict[str, str]:
+    """
+    Parse a client certificate subject string into its fields.
+    
+    Args:
+        cert_subject: Subject string (format: "C=US, ST=Ohio, L=Westerville, ...")
+        
+    Returns:
+        Dictionary mapping subject field names to values
+    """
+    fields: Dict[str, str] = {}
+    for rdn in _CERT_RDN_SPLIT_RE.split(cert_subject):
+        key, sep, value = rdn.partition('=')
+        if sep:
+            fields[key.strip()] = value.strip()
+    return fields
+
+
+def _ip_to_int(ip: str) -> Optional[int]:
+    """
+    Convert an IP address to an integer in the IPv6 address space.
+    
+    Args:
+        ip: IPv4 or IPv6 address string
+        
+    Returns:
+        Address as an integer (IPv4 as an IPv4-mapped address), or None if it is not a valid IP
+    """
+    try:
+        if ":" in ip:
+            return int.from_bytes(socket.inet_pton(socket.AF_INET6, ip), "big")
+        return _IPV4_MAPPED | int.from_bytes(socket.inet_pton(socket.AF_INET, ip), "big")
+    except (OSError, ValueError):
+        return None
 
 
-def check_headers(headers: Dict[str, str], client_ip: Optional[str] = None, 
+@functools.lru_cache(maxsize=4)
+def _compile_allowed_ranges(allowed: FrozenSet[str]) -> Tuple[Tuple[int, ...], Tuple[int, ...]]:
+    """
+    Compile whitelist entries into sorted, non-overlapping address ranges.
+    
+    Args:
+        allowed: IP addresses and CIDR ranges
+        
+    Returns:
+        Tuple of (range starts, range ends), both sorted and inclusive
+        
+    Raises:
+        ValueError: If an entry is not a valid IP address or network
+    """
+    ranges: List[List[int]] = []
+    for entry in allowed:
+        network = ipaddress.ip_network(entry, strict=False)
+        start, end = int(network.network_address), int(network.broadcast_address)
+        if network.version == 4:
+            start, end = _IPV4_MAPPED | start, _IPV4_MAPPED | end
+        ranges.append([start, end])
+    
+    # Merge overlapping or adjacent ranges so each address falls in at most one
+    ranges.sort()
+    merged: List[List[int]] = []
+    for start, end in ranges:
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return tuple(start for start, _ in merged), tuple(end for _, end in merged)
+
+
+@functools.lru_cache(maxsize=1024)
+def _ip_allowed(client_ip: str, allowed: FrozenSet[str]) -> bool:
+    """
+    Check whether an IP address falls within any whitelisted address or range.
+    
+    Decisions are cached per (address, whitelist), so bursts from the same sender skip the
+    address parsing and range search; a replaced whitelist is a new key, so no clearing is needed
+    (call _ip_allowed.cache_clear() to release memory).
+    
+    Args:
+        client_ip: Client IP address
+        allowed: IP addresses and CIDR ranges (compiled once per distinct set)
+        
+    Returns:
+        True if the address is whitelisted, False otherwise (including invalid addresses)
+    """
+    address = _ip_to_int(client_ip)
+    if address is None:
+        return False
+    starts, ends = _compile_allowed_ranges(allowed)
+    i = bisect_right(starts, address) - 1
+    return i >= 0 and address <= ends[i]
+
+
+# Compile the default whitelist at import so a malformed entry fails on load, not on a webhook
+_compile_allowed_ranges(TRADINGVIEW_ALLOWED_IPS)
+
+
+def _check_ip_whitelist(client_ip: Optional[str]) -> Optional[str]:
+    """
+    Check the client IP against TRADINGVIEW_ALLOWED_IPS.
+    
+    Args:
+        client_ip: Client IP address
+        
+    Returns:
+        Error message, or None if the IP is allowed
+    """
+    if not TRADINGVIEW_ALLOWED_IPS:
+        logging.warning("IP whitelist is enabled but TRADINGVIEW_ALLOWED_IPS is empty")
+    elif client_ip:
+        if not _ip_allowed(client_ip, TRADINGVIEW_ALLOWED_IPS):
+            logging.warning("Rejected request from non-whitelisted IP: %s", client_ip)
+            return f"Unauthorized IP address: {client_ip}"
+    else:
+        logging.warning("IP whitelist is enabled but client IP is not available")
+        return "Unable to verify client IP"
+    return None
+
+
+def _check_client_cert(client_cert: Optional[Dict[str, str]]) -> Optional[str]:
+    """
+    Check the client certificate subject against TRADINGVIEW_CERT_SUBJECT.
+    
+    Args:
+        client_cert: Client certificate subject fields (if available)
+        
+    Returns:
+        Error message, or None if the certificate is valid
+    """
+    if not client_cert:
+        logging.warning("Certificate check is enabled but no certificate provided")
+        return "Client certificate required but not provided"
+    
+    # Verify certificate subject fields; only walk them one by one to report a mismatch
+    try:
+        cert_matches = _get_cert_fields(client_cert) == _EXPECTED_CERT_VALUES
+    except KeyError:
+        cert_matches = False
+    if not cert_matches:
+        for field, expected_value in _EXPECTED_CERT:
+            actual_value = client_cert.get(field)
+            if actual_value != expected_value:
+                logging.warning("Certificate validation failed: %s = %s, expected %s", field, actual_value, expected_value)
+                return f"Invalid certificate: {field} mismatch"
+    
+    logging.info("Client certificate validated successfully")
+    return None
+
+
+def _skip_check(value: Any) -> None:
+    """Stand-in for a disabled check: always passes."""
+    return None
+
+
+def get_config() -> ValidationConfig:
+    """
+    Return the active security check settings.
+    
+    Returns:
+        ValidationConfig last passed to configure() (loaded from the environment at import)
+    """
+    return _CONFIG
+
+
+def configure(config: ValidationConfig) -> None:
+    """
+    Replace the active security check settings used by check_headers and get_config().
+    
+    The IP and certificate checks are chosen here, so check_headers never tests the flags.
+    
+    Args:
+        config: New settings (e.g. ValidationConfig.from_env() after changing the environment, or in tests)
+    """
+    global _CONFIG, _ip_check, _cert_check
+    _CONFIG = config
+    _ip_check = _check_ip_whitelist if config.ip_whitelist else _skip_check
+    _cert_check = _check_client_cert if config.cert_check else _skip_check
+
+
+_ip_check: Callable[[Optional[str]], Optional[str]] = _skip_check
+_cert_check: Callable[[Optional[Dict[str, str]]], Optional[str]] = _skip_check
+configure(_CONFIG)
+
+
+def check_headers(headers: Mapping[str, str], client_ip: Optional[str] = None, 
                   client_cert: Optional[Dict[str, str]] = None) -> tuple[bool, Optional[str]]:
     """
     Validate request headers, client IP, and certificate.
     
     Args:
-        headers: Request headers
+        headers: Request headers, looked up by lower-case name (e.g. func.HttpRequest.headers,
+            which is case-insensitive, or a dict with lower-case keys; only read)
         client_ip: Client IP address
         client_cert: Client certificate subject fields (if available)
         
     Returns:
         Tuple of (is_valid, error_message)
     """
-    logging.debug(f"ENABLE_IP_WHITELIST={ENABLE_IP_WHITELIST}, ENABLE_CERT_CHECK={ENABLE_CERT_CHECK}, DRY_RUN_MODE={DRY_RUN_MODE}")
-    # Check Content-Type
-    content_type = headers.get('content-type', '').lower()
-    if 'application/json' not in content_type:
+    if logging.getLogger().isEnabledFor(logging.DEBUG):
+        config = _CONFIG
+        logging.debug("ENABLE_IP_WHITELIST=%s, ENABLE_CERT_CHECK=%s, DRY_RUN_MODE=%s",
+                      config.ip_whitelist, config.cert_check, config.dry_run)
+    # Check the Content-Type media type (parameters such as "; charset=utf-8" are ignored);
+    # the usual lower-case value matches without lowering a copy
+    media_type = headers.get('content-type', '').partition(';')[0].strip()
+    if media_type != 'application/json' and media_type.lower() != 'application/json':
         return False, "Content-Type must be application/json"
     
-    # Validate IP whitelist if enabled
-    if ENABLE_IP_WHITELIST:
-        if not TRADINGVIEW_ALLOWED_IPS:
-            logging.warning("IP whitelist is enabled but TRADINGVIEW_ALLOWED_IPS is empty")
-        elif client_ip:
-            if client_ip not in TRADINGVIEW_ALLOWED_IPS:
-                logging.warning(f"Rejected request from non-whitelisted IP: {client_ip}")
-                return False, f"Unauthorized IP address: {client_ip}"
-        else:
-            logging.warning("IP whitelist is enabled but client IP is not available")
-            return False, "Unable to verify client IP"
-    
-    # Validate client certificate if enabled
-    if ENABLE_CERT_CHECK:
-        if not client_cert:
-            logging.warning("Certificate check is enabled but no certificate provided")
-            return False, "Client certificate required but not provided"
-        
-        # Verify certificate subject fields
-        for field, expected_value in TRADINGVIEW_CERT_SUBJECT.items():
-            actual_value = client_cert.get(field)
-            if actual_value != expected_value:
-                logging.warning(f"Certificate validation failed: {field} = {actual_value}, expected {expected_value}")
-                return False, f"Invalid certificate: {field} mismatch"
-        
-        logging.info("Client certificate validated successfully")
+    # Validate IP whitelist and client certificate (each a no-op when disabled)
+    error = _ip_check(client_ip) or _cert_check(client_cert)
+    if error is not None:
+        return False, error
     
     return True, None
 
 
+def _check_positive_number(field: str, value: Any) -> Optional[str]:
+    """
+    Check a payload value is a positive number or numeric string.
+    
+    Dispatches on the exact type: orjson decodes JSON numbers to int/float, so those are
+    range-checked directly and only strings go through float(). Booleans are rejected.
+    
+    Args:
+        field: Payload field name (for the error message)
+        value: Field value
+        
+    Returns:
+        Error message, or None if the value is valid
+    """
+    value_type = type(value)
+    if value_type is str:
+        try:
+            value = float(value)
+        except ValueError:
+            return f"Field '{field}' must be a valid number"
+    elif value_type is not int and value_type is not float:
+        return f"Field '{field}' must be a valid number"
+    
+    if value <= 0:
+        return f"Field '{field}' must be a positive number"
+    return None
+
+
 def validate_payload(payload: Dict[str, Any]) -> tuple[bool, Optional[str]]:
     """
     Validate the webhook payload contains required fields.
@@ -88,35 +336,35 @@ def validate_payload(payload: Dict[str, Any]) -> tuple[bool, Optional[str]]:
     Returns:
         Tuple of (is_valid, error_message)
     """
-    # Check for required fields
-    missing_fields = REQUIRED_FIELDS - payload.keys()
-    if missing_fields:
+    # Check for required fields (single subset test against the keys view, which needs no temporary set;
+    # only build the diff on failure, sorted so the message is stable)
+    if not REQUIRED_FIELDS <= payload.keys():
+        missing_fields = sorted(REQUIRED_FIELDS - payload.keys())
         return False, f"Missing required fields: {', '.join(missing_fields)}"
     
+    # Every required field is present, so read each one once by index
+    symbol = payload["symbol"]
+    action = payload["action"]
+    quantity_type = payload["quantity_type"]
+    quantity = payload["quantity"]
+    close = payload["close"]
+    
     # Validate field types and values
-    if not isinstance(payload.get("symbol"), str) or not payload.get("symbol"):
+    if not isinstance(symbol, str) or not symbol:
         return False, "Field 'symbol' must be a non-empty string"
     
-    if payload.get("action") not in ["buy", "sell"]:
+    # isinstance first: frozenset membership raises TypeError for unhashable values such as lists
+    if not isinstance(action, str) or action not in VALID_ACTIONS:
         return False, "Field 'action' must be 'buy' or 'sell'"
     
-    if payload.get("quantity_type") not in ["cash", "contracts", "percent"]:
+    if not isinstance(quantity_type, str) or quantity_type not in VALID_QUANTITY_TYPES:
         return False, "Field 'quantity_type' must be 'cash', 'contracts', or 'percent'"
     
-    # Validate quantity is numeric
-    try:
-        quantity = float(payload.get("quantity", 0))
-        if quantity <= 0:
-            return False, "Field 'quantity' must be a positive number"
-    except (ValueError, TypeError):
-        return False, "Field 'quantity' must be a valid number"
-    
-    # Validate close price is numeric
-    try:
-        close = float(payload.get("close", 0))
-        if close <= 0:
-            return False, "Field 'close' must be a positive number"
-    except (ValueError, TypeError):
-        return False, "Field 'close' must be a valid number"
+    # Validate quantity and close price are positive numbers
+    error = _check_positive_number("quantity", quantity)
+    if error is None:
+        error = _check_positive_number("close", close)
+    if error is not None:
+        return False, error
     
     return True, None
\ No newline at end of file